@@ -250,6 +250,8 @@ class IndividualChatTranscriptAdmin(ReadonlyAdmin):
         "week_number",
         "school_name",
     )
+    list_select_related = ("session__user", "instruction_prompt_blob", "chat_history_blob")
+    readonly_fields = ("instruction_prompt", "chat_history")
     search_fields = ("content",)
     list_filter = (
         "role",
@@ -327,6 +329,7 @@ class GroupChatTranscriptAdmin(ReadonlyAdmin):
         ),
     )
 
+    readonly_fields = ("instruction_prompt", "chat_history", "pipeline_record_link")
     search_fields = ("content",)
     list_filter = (
         "role",
@@ -479,6 +482,7 @@ class IndividualPipelineRecordAdmin(ReadonlyAdmin):
     )
     search_fields = ("message", "validated_message", "error_log")
     list_filter = ("status",)
+    readonly_fields = ("instruction_prompt", "chat_history")
 
 
 @admin.register(GroupPipelineRecord)
@@ -486,6 +490,7 @@ class GroupPipelineRecordAdmin(ReadonlyAdmin):
     list_display = ("user", "transcript", "status", "message", "validated_message", "error_log", "updated_at")
     search_fields = ("message", "validated_message", "error_log")
     list_filter = ("status",)
+    readonly_fields = ("instruction_prompt", "chat_history")
 
 
 @admin.register(IndividualSession)
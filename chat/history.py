@@ -0,0 +1,100 @@
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, models, transaction
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+
+
+class HistoryPolicy:
+    FULL = "full"
+    CREATE = "create"
+    OFF = "off"
+
+
+def history_policy(model: type[models.Model]) -> str:
+    """The HISTORY_POLICIES entry of the model, "full" if it has none."""
+    policy = settings.HISTORY_POLICIES.get(model._meta.label, HistoryPolicy.FULL)
+    if policy not in (HistoryPolicy.FULL, HistoryPolicy.CREATE, HistoryPolicy.OFF):
+        raise ImproperlyConfigured(f"Unknown history policy '{policy}' for {model._meta.label}")
+    return policy
+
+
+class _HistoryBuffer(threading.local):
+    def __init__(self):
+        self.rows: dict[type[models.Model], list[models.Model]] = defaultdict(list)
+        self.size = 0
+
+
+_buffer = _HistoryBuffer()
+
+
+def _buffer_history_row(history_instance: models.Model):
+    _buffer.rows[type(history_instance)].append(history_instance)
+    _buffer.size += 1
+    if _buffer.size >= settings.HISTORY_BATCH_SIZE:
+        flush_history()
+
+
+def flush_history(**kwargs):
+    """
+    Inserts the history rows buffered by HISTORY_BATCHED_WRITES, one bulk insert per history table. Connected
+    to the end of each request and celery task, and can be called directly (e.g. at the end of a command).
+    """
+    rows, _buffer.rows, _buffer.size = _buffer.rows, defaultdict(list), 0
+    for history_model, history_instances in rows.items():
+        history_model.objects.bulk_create(history_instances)
+
+
+class PolicyHistoricalRecords(HistoricalRecords):
+    """
+    HistoricalRecords that applies HISTORY_POLICIES to each model: "full" records every save and delete,
+    "create" only records creation, and "off" records nothing.
+
+    With HISTORY_BATCHED_WRITES, history rows are buffered (once the saving transaction commits) and written in
+    bulk by flush_history instead of one insert per save. The pre/post_create_historical_record signals are not
+    sent for buffered rows.
+    """
+
+    def post_save(self, instance, created, using=None, **kwargs):
+        policy = history_policy(type(instance))
+        if policy == HistoryPolicy.OFF or (policy == HistoryPolicy.CREATE and not created):
+            return
+        super().post_save(instance, created, using=using, **kwargs)
+
+    def post_delete(self, instance, using=None, **kwargs):
+        if history_policy(type(instance)) != HistoryPolicy.FULL:
+            return
+        super().post_delete(instance, using=using, **kwargs)
+
+    def create_historical_record(self, instance, history_type, using=None):
+        if not settings.HISTORY_BATCHED_WRITES:
+            return super().create_historical_record(instance, history_type, using=using)
+
+        manager = getattr(instance, self.manager_name)
+        # snapshot the instance now, as it may be saved again before the buffer is flushed
+        history_instance = manager.model(
+            history_date=getattr(instance, "_history_date", timezone.now()),
+            history_type=history_type,
+            history_user=self.get_history_user(instance),
+            history_change_reason=self.get_change_reason_for_object(instance, history_type, using),
+            **{field.attname: getattr(instance, field.attname) for field in self.fields_included(instance)},
+        )
+        if connection.in_atomic_block:
+            # history of a save that is rolled back is dropped along with it
+            transaction.on_commit(lambda: _buffer_history_row(history_instance))
+        else:
+            _buffer_history_row(history_instance)
+
+
+def bulk_history_create(model: type[models.Model], objs: list[models.Model], update: bool = False):
+    """
+    Records history for rows written without model signals (e.g. by bulk_create), following the model's
+    HISTORY_POLICIES entry.
+    """
+    policy = history_policy(model)
+    if policy == HistoryPolicy.OFF or (policy == HistoryPolicy.CREATE and update):
+        return
+    model.history.bulk_history_create(objs, update=update)
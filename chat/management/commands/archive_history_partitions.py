@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chat.services.history_partitions import (
+    PARTITIONED_HISTORY_MODELS,
+    archive_history_partition,
+    list_history_partitions,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the monthly partitions of the transcript and pipeline record history tables that are older than "
+        "--older-than-months to gzipped csv files, then detach and drop them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-months",
+            type=int,
+            default=settings.HISTORY_ARCHIVE_AFTER_MONTHS,
+            help="Archive partitions that end at least this many months before the current month",
+        )
+        parser.add_argument("--output-dir", default=settings.HISTORY_ARCHIVE_DIR, help="Where to write the archives")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would be archived")
+
+    def handle(self, *args, **options):
+        cutoff = month_start(timezone.now(), -options["older_than_months"])
+        self.stdout.write(f"Archiving history partitions ending on or before {cutoff.date()}")
+        for model in PARTITIONED_HISTORY_MODELS:
+            table = model._meta.db_table
+            for partition in list_history_partitions(table):
+                if partition.is_default or partition.upper > cutoff:
+                    continue
+                if options["dry_run"]:
+                    self.stdout.write(f"Would archive {partition.name}")
+                    continue
+                path, rows = archive_history_partition(table, partition, options["output_dir"])
+                self.stdout.write(f"Archived {rows} rows of {partition.name} to {path}")
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+
+from chat.models import IndividualSession, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the database setup overhead per message, by running a pipeline-like lookup between the "
+        "connection handling Django does at the start and end of each request and celery task, with a new "
+        "connection per message and with the configured connection settings. Only reads from the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200, help="Messages simulated per configuration")
+
+    def handle(self, *args, **options):
+        configured_max_age = connection.settings_dict["CONN_MAX_AGE"]
+        participant_id = User.objects.values_list("id", flat=True).first() or "benchmark-participant"
+        try:
+            for label, max_age in [("new connection per message", 0), ("configured", configured_max_age)]:
+                connection.settings_dict["CONN_MAX_AGE"] = max_age
+                connection.close()
+                self._report(label, max_age, *self._run(participant_id, options["messages"]), options["messages"])
+        finally:
+            connection.settings_dict["CONN_MAX_AGE"] = configured_max_age
+            connection.close()
+
+    def _run(self, participant_id: str, messages: int) -> tuple[float, int]:
+        connections = 0
+
+        def _count(**kwargs):
+            nonlocal connections
+            connections += 1
+
+        connection_created.connect(_count)
+        try:
+            start = time.perf_counter()
+            for _ in range(messages):
+                # as Django does around each request and celery around each task
+                close_old_connections()
+                IndividualSession.objects.filter(user_id=participant_id).order_by("-created_at").first()
+                close_old_connections()
+            return time.perf_counter() - start, connections
+        finally:
+            connection_created.disconnect(_count)
+
+    def _report(self, label: str, max_age, elapsed: float, connections: int, messages: int):
+        pooled = "pool" in connection.settings_dict.get("OPTIONS", {})
+        self.stdout.write(
+            f"{label} (CONN_MAX_AGE={max_age}{', pooled' if pooled else ''}): "
+            f"{elapsed / messages * 1000:.2f} ms per message, {connections} connections opened"
+        )
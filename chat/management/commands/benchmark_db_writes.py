@@ -0,0 +1,149 @@
+import json
+import os
+import re
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from celery import current_app
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_celery_results.models import TaskResult
+
+from chat.models import Group, GroupScheduledTaskAssociation, MessageType, User
+from chat.services import group_pipeline, individual_pipeline
+
+_BENCHMARK_ID_PREFIX = "benchmark-writes-"
+_WRITE_STATEMENT = re.compile(r'^\s*(INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)"?', re.IGNORECASE)
+_CTE_INSERT = re.compile(r'INSERT\s+INTO\s+"?(\w+)"?', re.IGNORECASE)
+
+_PIPELINE_TASKS = [
+    individual_pipeline.individual_pipeline,
+    group_pipeline.handle_inbound_group_message,
+    group_pipeline.take_action_on_group,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run simulated individual and group messages through the pipelines (with external calls stubbed) and "
+        "report database writes per message, by table. Writes to the database, so only runs in development."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=20, help="Messages sent through each pipeline")
+        parser.add_argument("--participants", type=int, default=4, help="Participants (and group members)")
+        parser.add_argument(
+            "--result-policy",
+            choices=["configured", "db"],
+            default="configured",
+            help="Use TASK_RESULT_POLICIES, or store every pipeline task result in the database (the old behavior)",
+        )
+
+    def handle(self, *args, **options):
+        if os.environ.get("DJANGO_ENV") != "dev":
+            raise CommandError(
+                f"This command can only be run in a development environment. Found '{os.environ.get('DJANGO_ENV')}'"
+            )
+
+        run_prefix = f"{_BENCHMARK_ID_PREFIX}{uuid.uuid4().hex[:8]}-"
+        task_ids: list[str] = []
+        conf = current_app.conf
+        previous_conf = (conf.task_always_eager, conf.task_store_eager_result)
+        try:
+            # run tasks in process, but store their results as a worker would
+            conf.task_always_eager, conf.task_store_eager_result = True, True
+            with ExitStack() as stack:
+                self._stub_external_calls(stack)
+                if options["result_policy"] == "db":
+                    for task in _PIPELINE_TASKS:
+                        stack.enter_context(patch.object(task, "ignore_result", False))
+
+                individual_writes = self._count_writes(
+                    lambda: self._send_individual_messages(
+                        run_prefix, options["participants"], options["messages"], task_ids
+                    )
+                )
+                group_writes = self._count_writes(
+                    lambda: self._send_group_messages(
+                        run_prefix, options["participants"], options["messages"], task_ids
+                    )
+                )
+            self._report("individual", individual_writes, options["messages"])
+            self._report("group", group_writes, options["messages"])
+        finally:
+            conf.task_always_eager, conf.task_store_eager_result = previous_conf
+            # deleting users and groups cascades to their sessions, transcripts, records and scheduled tasks
+            User.objects.filter(id__startswith=run_prefix).delete()
+            Group.objects.filter(id__startswith=run_prefix).delete()
+            TaskResult.objects.filter(task_id__in=task_ids).delete()
+
+    def _stub_external_calls(self, stack: ExitStack):
+        for target, return_value in [
+            ("chat.services.individual_pipeline.moderate_message", ""),
+            ("chat.services.individual_pipeline.load_instruction_prompt", "Benchmark instruction prompt"),
+            ("chat.services.individual_pipeline.generate_response", ("Benchmark response", 10, 10)),
+            ("chat.services.individual_pipeline.send_message_to_participant", {"status": "ok"}),
+            ("chat.services.group_pipeline.moderate_message", ""),
+            ("chat.services.group_pipeline.load_instruction_prompt", "Benchmark instruction prompt"),
+            ("chat.services.group_pipeline.generate_response", ("Benchmark response", 10, 10)),
+            ("chat.services.group_pipeline.send_message_to_participant_group", {"status": "ok"}),
+        ]:
+            stack.enter_context(patch(target, return_value=return_value))
+
+    def _count_writes(self, send) -> Counter:
+        writes: Counter = Counter()
+
+        def _count(execute, sql, params, many, context):
+            match = _WRITE_STATEMENT.match(sql)
+            if match:
+                writes[(match.group(1).split()[0].upper(), match.group(2))] += 1
+            elif sql.lstrip().upper().startswith("WITH"):
+                # data modifying CTEs, which only write the rows that changed
+                for table in _CTE_INSERT.findall(sql):
+                    writes[("UPSERT", table)] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(_count):
+            send()
+        return writes
+
+    def _context(self) -> dict:
+        return {
+            "school_name": "Benchmark School",
+            "school_mascot": "Benchmark Mascot",
+            "initial_message": "Benchmark initial message",
+            "week_number": 1,
+            "message_type": MessageType.INITIAL,
+        }
+
+    def _send_individual_messages(self, run_prefix: str, participants: int, messages: int, task_ids: list[str]):
+        for m in range(messages):
+            participant_id = f"{run_prefix}p{m % participants}"
+            data = {
+                "context": {**self._context(), "name": f"Participant {m % participants}"},
+                "message": f"message {m}",
+            }
+            task_ids.append(individual_pipeline.individual_pipeline.delay(participant_id, data).id)
+
+    def _send_group_messages(self, run_prefix: str, participants: int, messages: int, task_ids: list[str]):
+        group_id = f"{run_prefix}group"
+        context = {
+            **self._context(),
+            "participants": [{"id": f"{group_id}-p{p}", "name": f"Participant {p}"} for p in range(participants)],
+        }
+        for m in range(messages):
+            data = {"context": context, "sender_id": f"{group_id}-p{m % participants}", "message": f"message {m}"}
+            task_ids.append(group_pipeline.handle_inbound_group_message.delay(group_id, data).id)
+            # fire the scheduled response straight away, as beat would once the wait is over
+            association = GroupScheduledTaskAssociation.objects.filter(group_id=group_id).first()
+            if association:
+                kwargs = json.loads(association.task.kwargs)
+                task_ids.append(group_pipeline.take_action_on_group.delay(**kwargs).id)
+
+    def _report(self, pipeline: str, writes: Counter, messages: int):
+        total = sum(writes.values())
+        self.stdout.write(f"{pipeline}: {total} writes for {messages} messages ({total / messages:.1f} per message)")
+        for (statement, table), count in writes.most_common():
+            self.stdout.write(f"  {statement:<6} {table:<45} {count / messages:.1f} per message")
@@ -0,0 +1,119 @@
+import os
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from chat.models import Group, GroupPipelineRecord, MessageType
+from chat.services import group_pipeline
+
+_BENCHMARK_GROUP_PREFIX = "benchmark-contention-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate bursts of concurrent inbound messages across many groups and report per-group contention, "
+        "with or without the group ingest lease. Writes to the database, so only runs in development."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", type=int, default=50, help="Number of simulated groups")
+        parser.add_argument("--participants", type=int, default=4, help="Participants per group")
+        parser.add_argument("--messages", type=int, default=2, help="Messages sent by each participant")
+        parser.add_argument("--workers", type=int, default=16, help="Concurrent worker threads")
+        parser.add_argument(
+            "--moderation-latency-ms", type=int, default=200, help="Simulated moderation API latency"
+        )
+        parser.add_argument("--lock", choices=["on", "off"], default="on", help="Enable the group ingest lease")
+
+    def handle(self, *args, **options):
+        if os.environ.get("DJANGO_ENV") != "dev":
+            raise CommandError(
+                f"This command can only be run in a development environment. Found '{os.environ.get('DJANGO_ENV')}'"
+            )
+
+        run_prefix = f"{_BENCHMARK_GROUP_PREFIX}{uuid.uuid4().hex[:8]}-"
+        calls = self._build_calls(run_prefix, options["groups"], options["participants"], options["messages"])
+        moderation_latency_seconds = options["moderation_latency_ms"] / 1000
+        outcomes: Counter = Counter()
+        schedule_calls = Counter()
+        original_schedule = group_pipeline._clear_existing_and_schedule_group_action
+
+        def _simulated_moderation(message: str) -> str:
+            time.sleep(moderation_latency_seconds)
+            return ""
+
+        def _counting_schedule(*args, **kwargs):
+            schedule_calls["schedule"] += 1
+            return original_schedule(*args, **kwargs)
+
+        def _run(call: tuple[str, dict]):
+            group_id, data = call
+            try:
+                group_pipeline.handle_inbound_group_message(group_id, data)
+                outcomes["ok"] += 1
+            except Exception as exc:
+                outcomes[type(exc).__name__] += 1
+            finally:
+                connection.close()
+
+        self.stdout.write(
+            f"Sending {len(calls)} messages for {options['groups']} groups "
+            f"with {options['workers']} workers (lock {options['lock']})"
+        )
+        try:
+            with (
+                override_settings(GROUP_INGEST_LOCK_ENABLED=options["lock"] == "on"),
+                patch.object(group_pipeline, "moderate_message", side_effect=_simulated_moderation),
+                patch.object(
+                    group_pipeline, "_clear_existing_and_schedule_group_action", side_effect=_counting_schedule
+                ),
+            ):
+                start = time.monotonic()
+                with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                    list(executor.map(_run, calls))
+                elapsed = time.monotonic() - start
+
+            statuses = Counter(
+                GroupPipelineRecord.objects.filter(group__id__startswith=run_prefix).values_list("status", flat=True)
+            )
+            self.stdout.write(f"Elapsed: {elapsed:.2f}s ({len(calls) / elapsed:.1f} messages/s)")
+            self.stdout.write(f"Task outcomes: {dict(outcomes)}")
+            self.stdout.write(f"Record statuses: {dict(statuses)}")
+            self.stdout.write(
+                f"Scheduled task rewrites: {schedule_calls['schedule']} for {options['groups']} groups "
+                f"({schedule_calls['schedule'] / options['groups']:.2f} per group)"
+            )
+        finally:
+            # deleting groups cascades to their records and scheduled task associations
+            Group.objects.filter(id__startswith=run_prefix).delete()
+
+    def _build_calls(self, run_prefix: str, groups: int, participants: int, messages: int) -> list[tuple[str, dict]]:
+        calls = []
+        for g in range(groups):
+            group_id = f"{run_prefix}{g}"
+            group_participants = [{"id": f"{group_id}-p{p}", "name": f"Participant {p}"} for p in range(participants)]
+            context = {
+                "school_name": "Benchmark School",
+                "school_mascot": "Benchmark Mascot",
+                "initial_message": "Benchmark initial message",
+                "week_number": 1,
+                "message_type": MessageType.INITIAL,
+                "participants": group_participants,
+            }
+            for m in range(messages):
+                for participant in group_participants:
+                    calls.append(
+                        (
+                            group_id,
+                            {"context": context, "sender_id": participant["id"], "message": f"message {m}"},
+                        )
+                    )
+        # interleave groups the way a burst after an initial message blast arrives
+        calls.sort(key=lambda call: call[1]["message"])
+        return calls
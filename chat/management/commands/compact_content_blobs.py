@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from chat.models import (
+    ContentBlob,
+    GroupChatTranscript,
+    GroupPipelineRecord,
+    IndividualChatTranscript,
+    IndividualPipelineRecord,
+    compute_content_hash,
+)
+
+_BLOB_TEXT_FIELDS = ["instruction_prompt", "chat_history"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Move instruction prompts and chat histories that are still stored inline (rows written before content "
+        "blobs existed, and their history) into deduplicated content blobs, in batches. The freed space is "
+        "reclaimed by the next VACUUM of each table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows compacted per transaction")
+
+    def handle(self, *args, **options):
+        for model in [IndividualChatTranscript, GroupChatTranscript, IndividualPipelineRecord, GroupPipelineRecord]:
+            for table_model in [model, model.history.model]:
+                rows, inline_bytes = self._compact(table_model, options["batch_size"])
+                self.stdout.write(
+                    f"{table_model._meta.db_table}: compacted {rows} rows, moved {inline_bytes} bytes into blobs"
+                )
+
+    def _compact(self, model: type[models.Model], batch_size: int) -> tuple[int, int]:
+        pk_name = model._meta.pk.attname
+        inline_filter = models.Q()
+        for field_name in _BLOB_TEXT_FIELDS:
+            inline_filter |= models.Q(**{f"{field_name}_inline__isnull": False})
+        value_names = [pk_name]
+        for field_name in _BLOB_TEXT_FIELDS:
+            value_names += [f"{field_name}_blob_id", f"{field_name}_inline"]
+
+        compacted_rows = inline_bytes = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                # rows are locked so that a concurrent save of a new prompt is not overwritten with the old one
+                batch = list(
+                    model._default_manager.filter(inline_filter, **{f"{pk_name}__gt": last_pk})
+                    .select_for_update()
+                    .order_by(pk_name)
+                    .values(*value_names)[:batch_size]
+                )
+                if not batch:
+                    break
+
+                blobs: dict[str, ContentBlob] = {}
+                updated = []
+                for row in batch:
+                    instance = model(**{pk_name: row[pk_name]})
+                    for field_name in _BLOB_TEXT_FIELDS:
+                        content = row[f"{field_name}_inline"]
+                        blob_id = row[f"{field_name}_blob_id"]
+                        if content is not None and blob_id is None:
+                            # a row with both has been written since, and its blob is what is read
+                            blob_id = compute_content_hash(content)
+                            blobs[blob_id] = ContentBlob(content_hash=blob_id, content=content)
+                            inline_bytes += len(content.encode("utf-8"))
+                        setattr(instance, f"{field_name}_blob_id", blob_id)
+                        setattr(instance, f"{field_name}_inline", None)
+                    updated.append(instance)
+
+                ContentBlob.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+                model._default_manager.bulk_update(
+                    updated,
+                    [f"{field_name}_{suffix}" for field_name in _BLOB_TEXT_FIELDS for suffix in ["blob", "inline"]],
+                )
+            compacted_rows += len(batch)
+            last_pk = batch[-1][pk_name]
+        return compacted_rows, inline_bytes
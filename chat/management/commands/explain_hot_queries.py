@@ -0,0 +1,133 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from chat.models import (
+    BaseChatTranscript,
+    Group,
+    GroupChatTranscript,
+    GroupPipelineRecord,
+    GroupSession,
+    IndividualChatTranscript,
+    IndividualPipelineRecord,
+    IndividualSession,
+    User,
+    compute_content_hash,
+)
+from chat.services.individual_crud import get_transcript_len_cutoff
+
+_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+_INDEX_SCAN = re.compile(r"(?:Index|Index Only|Bitmap Index) Scan(?: Backward)? (?:using|on) (\w+)")
+
+_CHAT_MODELS = [
+    IndividualSession,
+    GroupSession,
+    IndividualChatTranscript,
+    GroupChatTranscript,
+    IndividualPipelineRecord,
+    GroupPipelineRecord,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN ANALYZE on the pipeline's hot queries for a participant and a group, and report the indexes "
+        "they use and any sequential scans of the chat tables. Only reads from the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--participant-id", help="Participant to query for (default: most recently active)")
+        parser.add_argument("--group-id", help="Group to query for (default: most recently active)")
+        parser.add_argument(
+            "--disable-seqscan",
+            action="store_true",
+            help="Discourage sequential scans, to check that an index can serve each query on a small database",
+        )
+        parser.add_argument(
+            "--fail-on-seq-scan", action="store_true", help="Exit with an error if any hot query scans a chat table"
+        )
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the full plan of each query")
+
+    def handle(self, *args, **options):
+        user = self._get_user(options["participant_id"])
+        group = self._get_group(options["group_id"])
+        queries = {**self._individual_queries(user), **self._group_queries(group)}
+        chat_tables = {model._meta.db_table for model in _CHAT_MODELS}
+
+        regressions = []
+        with transaction.atomic():
+            if options["disable_seqscan"]:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for name, queryset in queries.items():
+                plan = queryset.explain(analyze=True)
+                seq_scans = sorted(set(_SEQ_SCAN.findall(plan)) & chat_tables)
+                indexes = sorted(set(_INDEX_SCAN.findall(plan)))
+                execution_time = re.search(r"Execution Time: ([\d.]+) ms", plan)
+                self.stdout.write(
+                    f"{name}: {execution_time.group(1) if execution_time else '?'} ms, "
+                    f"indexes: {', '.join(indexes) or '-'}"
+                    + (f", SEQ SCAN: {', '.join(seq_scans)}" if seq_scans else "")
+                )
+                if options["verbose_plans"]:
+                    self.stdout.write(plan)
+                if seq_scans:
+                    regressions.append(name)
+
+        if regressions and options["fail_on_seq_scan"]:
+            raise CommandError(f"Sequential scans in hot queries: {', '.join(regressions)}")
+
+    def _get_user(self, participant_id: str | None) -> User:
+        if participant_id:
+            return User.objects.get(id=participant_id)
+        user = User.objects.filter(sessions__isnull=False, group__isnull=True).order_by("-created_at").first()
+        if user is None:
+            raise CommandError("No participant with a session found, pass --participant-id")
+        return user
+
+    def _get_group(self, group_id: str | None) -> Group:
+        if group_id:
+            return Group.objects.get(id=group_id)
+        group = Group.objects.filter(sessions__isnull=False).order_by("-created_at").first()
+        if group is None:
+            raise CommandError("No group with a session found, pass --group-id")
+        return group
+
+    def _individual_queries(self, user: User) -> dict[str, QuerySet]:
+        session = IndividualSession.objects.filter(user=user).order_by("-created_at").first()
+        return {
+            # User.current_session and _load_instruction_prompt
+            "individual current session": IndividualSession.objects.filter(user=user).order_by("-created_at")[:1],
+            "individual latest pipeline record": IndividualPipelineRecord.objects.filter(user=user).order_by(
+                "-created_at"
+            )[:1],
+            "individual chat history": IndividualChatTranscript.objects.filter(session__user_id=user.id)
+            .exclude(moderation_status=BaseChatTranscript.ModerationStatus.FLAGGED)
+            .order_by("created_at"),
+            "individual latest user transcript": IndividualChatTranscript.objects.filter(
+                session__user_id=user.id, role=BaseChatTranscript.Role.USER
+            ).order_by("-created_at")[:1],
+            "individual session initial message": IndividualChatTranscript.objects.filter(
+                session=session, hub_initiated=True
+            ).order_by("created_at")[:1],
+            "individual initial message exists": IndividualChatTranscript.objects.filter(
+                session__user=user, content_hash=compute_content_hash("initial message"), hub_initiated=True
+            )[:1],
+        }
+
+    def _group_queries(self, group: Group) -> dict[str, QuerySet]:
+        session = GroupSession.objects.filter(group=group).order_by("-created_at").first()
+        return {
+            # Group.current_session
+            "group current session": GroupSession.objects.filter(group=group).order_by("-created_at")[:1],
+            "group latest pipeline record": GroupPipelineRecord.objects.filter(group=group).order_by("-created_at")[:1],
+            "group chat history": GroupChatTranscript.objects.filter(session=session)
+            .exclude(moderation_status=BaseChatTranscript.ModerationStatus.FLAGGED)
+            .select_related("sender")
+            .order_by("-created_at", "-id")[: get_transcript_len_cutoff() + 1],
+            "group session initial message": GroupChatTranscript.objects.filter(
+                session=session, hub_initiated=True
+            ).order_by("created_at")[:1],
+        }
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from chat.services.history_retention import prune_model_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the history that HISTORY_RETENTION_POLICIES does not keep (as the scheduled prune_history task "
+        "does), and report the rows and bytes reclaimed per model."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+        parser.add_argument("--model", action="append", help="Only prune this model (e.g. chat.User), repeatable")
+
+    def handle(self, *args, **options):
+        total_rows = total_bytes = 0
+        for label in options["model"] or settings.HISTORY_RETENTION_POLICIES:
+            report = prune_model_history(label, dry_run=options["dry_run"])
+            total_rows += report.rows
+            total_bytes += report.bytes
+            self.stdout.write(f"{label}: {report.rows} rows, {report.bytes / 1024 / 1024:.1f} MiB")
+        verb = "Would reclaim" if options["dry_run"] else "Reclaimed"
+        self.stdout.write(
+            f"{verb} {total_rows} rows, {total_bytes / 1024 / 1024:.1f} MiB (space is reusable after VACUUM)"
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0075_alter_controlconfig_key_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="group",
+            name="lease_fencing_token",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="historicalgroup",
+            name="lease_fencing_token",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-19 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0076_group_lease_fencing_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grouppipelinerecord',
+            name='precomputed_high_water_mark',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='grouppipelinerecord',
+            name='precomputed_strategy_phase',
+            field=models.CharField(blank=True, choices=[('before_audience', 'Before Audience'), ('audience', 'Audience'), ('after_audience', 'After Audience'), ('reminder', 'Reminder'), ('after_reminder', 'After Reminder'), ('followup', 'Followup'), ('after_followup', 'After Followup'), ('summary', 'Summary'), ('after_summary', 'After Summary')], max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalgrouppipelinerecord',
+            name='precomputed_high_water_mark',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalgrouppipelinerecord',
+            name='precomputed_strategy_phase',
+            field=models.CharField(blank=True, choices=[('before_audience', 'Before Audience'), ('audience', 'Audience'), ('after_audience', 'After Audience'), ('reminder', 'Reminder'), ('after_reminder', 'After Reminder'), ('followup', 'Followup'), ('after_followup', 'After Followup'), ('summary', 'Summary'), ('after_summary', 'After Summary')], max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from zoneinfo import ZoneInfo
+from django.db import migrations
+
+
+def create_prune_task_results_task(apps, schema_editor):
+    from django_celery_beat.models import PeriodicTask, CrontabSchedule
+
+    crontab, _ = CrontabSchedule.objects.get_or_create(
+        minute=30,
+        hour=3,
+        day_of_week="*",
+        day_of_month="*",
+        month_of_year="*",
+        timezone=ZoneInfo("America/Los_Angeles"),
+    )
+    task, _ = PeriodicTask.objects.get_or_create(
+        name="Prune task results",
+        task="chat.services.task_results.prune_task_results",
+        crontab=crontab,
+    )
+    task.save()
+
+
+def reverse_create_prune_task_results_task(apps, schema_editor):
+    from django_celery_beat.models import PeriodicTask
+
+    PeriodicTask.objects.filter(task="chat.services.task_results.prune_task_results").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chat", "0077_group_pipeline_record_precompute"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prune_task_results_task, reverse_create_prune_task_results_task),
+    ]
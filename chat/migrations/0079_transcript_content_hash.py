@@ -0,0 +1,31 @@
+import chat.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chat", "0078_create_prune_task_results_task"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="groupchattranscript",
+            name="content_hash",
+            field=chat.models.ContentHashField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalgroupchattranscript",
+            name="content_hash",
+            field=chat.models.ContentHashField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalindividualchattranscript",
+            name="content_hash",
+            field=chat.models.ContentHashField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="individualchattranscript",
+            name="content_hash",
+            field=chat.models.ContentHashField(blank=True, editable=False, null=True),
+        ),
+    ]
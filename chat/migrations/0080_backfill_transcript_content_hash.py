@@ -0,0 +1,56 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+_BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_content_hash(apps, schema_editor):
+    # runs outside a transaction (atomic = False), so each batch is committed on its own and
+    # only holds row locks on that batch while the app keeps writing transcripts
+    for model_name in ["IndividualChatTranscript", "GroupChatTranscript"]:
+        table = schema_editor.quote_name(apps.get_model("chat", model_name)._meta.db_table)
+        last_id = 0
+        with schema_editor.connection.cursor() as cursor:
+            while True:
+                cursor.execute(
+                    f"SELECT max(id) FROM (SELECT id FROM {table} WHERE id > %s ORDER BY id LIMIT %s) batch",
+                    [last_id, _BACKFILL_BATCH_SIZE],
+                )
+                batch_max_id = cursor.fetchone()[0]
+                if batch_max_id is None:
+                    break
+                # must match chat.models.compute_content_hash
+                cursor.execute(
+                    f"UPDATE {table} SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex') "
+                    "WHERE id > %s AND id <= %s AND content_hash IS NULL",
+                    [last_id, batch_max_id],
+                )
+                last_id = batch_max_id
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("chat", "0079_transcript_content_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="groupchattranscript",
+            index=models.Index(
+                condition=models.Q(("hub_initiated", True)),
+                fields=["session", "content_hash"],
+                name="chat_grp_transcript_hub_hash",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="individualchattranscript",
+            index=models.Index(
+                condition=models.Q(("hub_initiated", True)),
+                fields=["session", "content_hash"],
+                name="chat_ind_transcript_hub_hash",
+            ),
+        ),
+    ]
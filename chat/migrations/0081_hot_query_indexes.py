@@ -0,0 +1,56 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:11
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # indexes are built concurrently so that the tables stay writable, which cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ("chat", "0080_backfill_transcript_content_hash"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="groupchattranscript",
+            index=models.Index(
+                condition=models.Q(("moderation_status", "flagged"), _negated=True),
+                fields=["session", "created_at"],
+                name="chat_grp_transcript_history",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="groupchattranscript",
+            index=models.Index(fields=["session", "role", "-created_at"], name="chat_grp_transcript_role"),
+        ),
+        AddIndexConcurrently(
+            model_name="grouppipelinerecord",
+            index=models.Index(fields=["group", "-created_at"], name="chat_grp_record_group_created"),
+        ),
+        AddIndexConcurrently(
+            model_name="groupsession",
+            index=models.Index(fields=["group", "-created_at"], name="chat_grp_session_group_created"),
+        ),
+        AddIndexConcurrently(
+            model_name="individualchattranscript",
+            index=models.Index(
+                condition=models.Q(("moderation_status", "flagged"), _negated=True),
+                fields=["session", "created_at"],
+                name="chat_ind_transcript_history",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="individualchattranscript",
+            index=models.Index(fields=["session", "role", "-created_at"], name="chat_ind_transcript_role"),
+        ),
+        AddIndexConcurrently(
+            model_name="individualpipelinerecord",
+            index=models.Index(fields=["user", "-created_at"], name="chat_ind_record_user_created"),
+        ),
+        AddIndexConcurrently(
+            model_name="individualsession",
+            index=models.Index(fields=["user", "-created_at"], name="chat_ind_session_user_created"),
+        ),
+    ]
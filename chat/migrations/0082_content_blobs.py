@@ -0,0 +1,84 @@
+import chat.models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+_MODELS = [
+    "individualchattranscript",
+    "groupchattranscript",
+    "individualpipelinerecord",
+    "grouppipelinerecord",
+]
+_BLOB_TEXT_FIELDS = ["instruction_prompt", "chat_history"]
+
+
+def _keep_inline_columns():
+    # the text columns stay where they are (as <field>_inline) for rows written before blobs existed,
+    # so only the migration state changes
+    state_operations = []
+    for model_name in _MODELS + [f"historical{model_name}" for model_name in _MODELS]:
+        for field_name in _BLOB_TEXT_FIELDS:
+            state_operations += [
+                migrations.RenameField(model_name=model_name, old_name=field_name, new_name=f"{field_name}_inline"),
+                migrations.AlterField(
+                    model_name=model_name,
+                    name=f"{field_name}_inline",
+                    field=models.TextField(blank=True, db_column=field_name, editable=False, null=True),
+                ),
+            ]
+    return migrations.SeparateDatabaseAndState(state_operations=state_operations)
+
+
+def _add_blob_fields():
+    operations = []
+    for model_name in _MODELS:
+        for field_name in _BLOB_TEXT_FIELDS:
+            operations += [
+                migrations.AddField(
+                    model_name=model_name,
+                    name=f"{field_name}_blob",
+                    field=chat.models.ContentBlobField(
+                        blank=True,
+                        db_index=False,
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="chat.contentblob",
+                    ),
+                ),
+                migrations.AddField(
+                    model_name=f"historical{model_name}",
+                    name=f"{field_name}_blob",
+                    field=chat.models.ContentBlobField(
+                        blank=True,
+                        db_constraint=False,
+                        db_index=False,
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="chat.contentblob",
+                    ),
+                ),
+            ]
+    return operations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chat", "0081_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentBlob",
+            fields=[
+                ("content_hash", models.CharField(editable=False, max_length=64, primary_key=True, serialize=False)),
+                ("content", models.TextField(editable=False)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+        ),
+        _keep_inline_columns(),
+        *_add_blob_fields(),
+    ]
@@ -0,0 +1,119 @@
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.db import migrations
+
+_HISTORY_TABLES = [
+    "chat_historicalindividualchattranscript",
+    "chat_historicalgroupchattranscript",
+    "chat_historicalindividualpipelinerecord",
+    "chat_historicalgrouppipelinerecord",
+]
+_MONTHS_AHEAD = 3
+
+
+def _month_start(value: datetime, months: int) -> datetime:
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _partition_table(cursor, qn, table: str, boundary: datetime):
+    """
+    Replaces the table with one partitioned by month of history_date. The existing table becomes the
+    partition holding everything before `boundary`, keeping its rows, indexes and foreign keys, so no
+    rows are copied. History has no inbound foreign keys, so nothing else has to change.
+    """
+    legacy = f"{table}_legacy"
+    cursor.execute(
+        "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "WHERE i.indrelid = %s::regclass AND NOT i.indisprimary ORDER BY 1",
+        [table],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [table])
+    (primary_key,) = cursor.fetchone()
+    cursor.execute(f"SELECT COALESCE(max(history_id), 0) FROM {qn(table)}")
+    (max_history_id,) = cursor.fetchone()
+
+    cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+    # replaced by the parent's (history_id, history_date) primary key, as it has to include the partition key
+    cursor.execute(f"ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(primary_key)}")
+    # identity columns cannot be shared by partitions, so history_id moves to a sequence owned by the parent
+    cursor.execute(f"ALTER TABLE {qn(legacy)} ALTER COLUMN history_id DROP IDENTITY IF EXISTS")
+    cursor.execute(
+        f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+        "PARTITION BY RANGE (history_date)"
+    )
+    sequence = f"{table}_history_id_seq"
+    cursor.execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.history_id")
+    cursor.execute("SELECT setval(%s, %s)", [sequence, max_history_id + 1])
+    cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN history_id SET DEFAULT nextval(%s::regclass)", [sequence])
+    cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (history_id, history_date)")
+
+    cursor.execute(
+        f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(legacy)} FOR VALUES FROM (MINVALUE) TO (%s)", [boundary]
+    )
+    # the parent's indexes keep the original names (which the legacy indexes give up), and adopt the
+    # equivalent legacy indexes rather than building them again
+    for position, (name, definition) in enumerate(indexes):
+        cursor.execute(f"ALTER INDEX {qn(name)} RENAME TO {qn(f'{legacy}_{position}_idx')}")
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+
+    for months in range(_MONTHS_AHEAD):
+        start = _month_start(boundary, months)
+        cursor.execute(
+            f"CREATE TABLE {qn(f'{table}_p{start:%Y%m}')} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+            [start, _month_start(start, 1)],
+        )
+    cursor.execute(f"CREATE TABLE {qn(f'{table}_default')} PARTITION OF {qn(table)} DEFAULT")
+
+
+def partition_history_tables(apps, schema_editor):
+    boundary = _month_start(datetime.now(dt_timezone.utc), 1)
+    with schema_editor.connection.cursor() as cursor:
+        for table in _HISTORY_TABLES:
+            _partition_table(cursor, schema_editor.quote_name, table, boundary)
+
+
+def create_history_partitions_task(apps, schema_editor):
+    from django_celery_beat.models import PeriodicTask, CrontabSchedule
+
+    crontab, _ = CrontabSchedule.objects.get_or_create(
+        minute=45,
+        hour=3,
+        day_of_week="*",
+        day_of_month="*",
+        month_of_year="*",
+        timezone=ZoneInfo("America/Los_Angeles"),
+    )
+    task, _ = PeriodicTask.objects.get_or_create(
+        name="Create history partitions",
+        task="chat.services.history_partitions.create_history_partitions",
+        crontab=crontab,
+    )
+    task.save()
+
+
+def reverse_create_history_partitions_task(apps, schema_editor):
+    from django_celery_beat.models import PeriodicTask
+
+    PeriodicTask.objects.filter(task="chat.services.history_partitions.create_history_partitions").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chat", "0082_content_blobs"),
+    ]
+
+    operations = [
+        # not reversible: merging the partitions back into one table means copying every row
+        migrations.RunPython(partition_history_tables),
+        migrations.RunPython(create_history_partitions_task, reverse_create_history_partitions_task),
+    ]
@@ -0,0 +1,37 @@
+from zoneinfo import ZoneInfo
+from django.db import migrations
+
+
+def create_prune_history_task(apps, schema_editor):
+    from django_celery_beat.models import PeriodicTask, CrontabSchedule
+
+    crontab, _ = CrontabSchedule.objects.get_or_create(
+        minute=15,
+        hour=4,
+        day_of_week="*",
+        day_of_month="*",
+        month_of_year="*",
+        timezone=ZoneInfo("America/Los_Angeles"),
+    )
+    task, _ = PeriodicTask.objects.get_or_create(
+        name="Prune history",
+        task="chat.services.history_retention.prune_history",
+        crontab=crontab,
+    )
+    task.save()
+
+
+def reverse_create_prune_history_task(apps, schema_editor):
+    from django_celery_beat.models import PeriodicTask
+
+    PeriodicTask.objects.filter(task="chat.services.history_retention.prune_history").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chat", "0083_partition_history_tables"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prune_history_task, reverse_create_prune_history_task),
+    ]
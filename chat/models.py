@@ -1,11 +1,13 @@
 from datetime import timedelta
+import hashlib
 import logging
 import uuid
 from django.db import models
 from django.forms import ValidationError
 from django.utils import timezone
 from django_celery_beat.models import PeriodicTask
-from simple_history.models import HistoricalRecords
+
+from .history import PolicyHistoricalRecords
 
 
 logger = logging.getLogger(__name__)
@@ -53,7 +55,12 @@ class GroupStrategyPhasesThatAllowPrompts(models.TextChoices):
 
 
 class ModelBase(models.Model):
-    history = HistoricalRecords(inherit=True, excluded_fields=["created_at"])
+    history = PolicyHistoricalRecords(
+        inherit=True,
+        excluded_fields=["created_at"],
+        # blob references are only followed from a historical row, never looked up by blob
+        no_db_index=["instruction_prompt_blob", "chat_history_blob"],
+    )
 
     # created_at is duplicated in the HistoricalModel, but is useful for sorting. We don't
     # want to depend on the HistoricalModel for anything besides an audit log.
@@ -76,6 +83,8 @@ class Group(ModelBase):
     id = models.CharField(primary_key=True, max_length=255)
     is_test = models.BooleanField(default=False)
     gpt_model = models.CharField(max_length=100, null=True, blank=True, help_text="The model to use for only test user")
+    # highest group lease fencing token that has written on behalf of this group, see services/group_lock.py
+    lease_fencing_token = models.BigIntegerField(default=0, editable=False)
 
     @property
     def current_session(self) -> "IndividualSession | None":
@@ -139,6 +148,7 @@ class IndividualSession(BaseSession):
 
     class Meta(BaseSession.Meta):
         unique_together = ["user", "week_number", "message_type"]
+        indexes = [models.Index(fields=["user", "-created_at"], name="chat_ind_session_user_created")]
 
     def __str__(self):
         return f"{self.user} - {self.message_type} (wk {self.week_number})"
@@ -179,11 +189,98 @@ class GroupSession(BaseSession):
 
     class Meta(BaseSession.Meta):
         unique_together = ["group", "week_number", "message_type"]
+        indexes = [models.Index(fields=["group", "-created_at"], name="chat_grp_session_group_created")]
 
     def __str__(self):
         return f"{self.group} - {self.message_type} (wk {self.week_number})"
 
 
+def compute_content_hash(content: str | None) -> str | None:
+    if content is None:
+        return None
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ContentHashField(models.CharField):
+    """
+    Stores the sha256 hex digest of the instance's `content`, computed whenever the instance is saved
+    (including via bulk_create), so that content can be matched through an index instead of a TextField scan.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs["max_length"] = 64
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs["max_length"]
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = compute_content_hash(model_instance.content)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class ContentBlob(models.Model):
+    """
+    Text that is repeated across many rows (e.g. instruction prompts), stored once and referenced by its
+    content hash through a ContentBlobField. Blobs are immutable and never deleted.
+    """
+
+    content_hash = models.CharField(primary_key=True, max_length=64, editable=False)
+    content = models.TextField(editable=False)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    def __str__(self):
+        return self.content_hash
+
+
+class ContentBlobField(models.ForeignKey):
+    """
+    References a ContentBlob. A blob assigned through content_blob_property is written (if it is not stored
+    already) just before the row referencing it, including via bulk_create.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("to", "chat.ContentBlob")
+        kwargs.setdefault("on_delete", models.PROTECT)
+        kwargs.setdefault("related_name", "+")
+        kwargs.setdefault("null", True)
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("editable", False)
+        # blobs are never deleted, so nothing looks rows up by blob
+        kwargs.setdefault("db_index", False)
+        super().__init__(**kwargs)
+
+    def pre_save(self, model_instance, add):
+        blob = self.get_cached_value(model_instance, None)
+        if blob is not None and blob._state.adding:
+            ContentBlob.objects.bulk_create([blob], ignore_conflicts=True)
+        return super().pre_save(model_instance, add)
+
+
+def content_blob_property(blob_field_name: str, inline_field_name: str) -> property:
+    """
+    Exposes the text referenced by a ContentBlobField as a plain string attribute, so callers and the admin
+    read and assign it as before. Rows written before blobs existed keep their text in the inline column
+    until compact_content_blobs moves it into a blob.
+    """
+
+    def fget(instance) -> str | None:
+        if getattr(instance, f"{blob_field_name}_id") is None:
+            return getattr(instance, inline_field_name)
+        return getattr(instance, blob_field_name).content
+
+    def fset(instance, value: str | None):
+        blob = None if value is None else ContentBlob(content_hash=compute_content_hash(value), content=value)
+        setattr(instance, blob_field_name, blob)
+        setattr(instance, inline_field_name, None)
+
+    return property(fget, fset)
+
+
 class BaseChatTranscript(ModelBase):
     class Role(models.TextChoices):
         USER = "user", "User"
@@ -199,8 +296,12 @@ class BaseChatTranscript(ModelBase):
     moderation_status = models.CharField(
         max_length=15, choices=ModerationStatus.choices, default=ModerationStatus.NOT_EVALUATED
     )
-    instruction_prompt = models.TextField(blank=True, null=True)
-    chat_history = models.TextField(blank=True, null=True)
+    instruction_prompt_blob = ContentBlobField()
+    instruction_prompt_inline = models.TextField(blank=True, null=True, editable=False, db_column="instruction_prompt")
+    instruction_prompt = content_blob_property("instruction_prompt_blob", "instruction_prompt_inline")
+    chat_history_blob = ContentBlobField()
+    chat_history_inline = models.TextField(blank=True, null=True, editable=False, db_column="chat_history")
+    chat_history = content_blob_property("chat_history_blob", "chat_history_inline")
     llm_latency = models.DurationField(default=timedelta(0), null=True)
     shorten_count = models.IntegerField(default=0, null=True)
     user_message = models.TextField(
@@ -218,22 +319,33 @@ class BaseChatTranscript(ModelBase):
         default=False,
         help_text="Whether the message was initiated by the hub (e.g. an initial message)",
     )
+    # indexed with the session for hub initiated messages, see initial_message_exists
+    content_hash = ContentHashField(blank=True, null=True)
 
     @classmethod
     def initial_message_exists(cls, initial_message: str | None, audience: User | Group) -> bool:
         if not initial_message:
             return True
         audience_kwarg = "session__user" if isinstance(audience, User) else "session__group"
-        try:
-            # NOTE might need an index on these fields for performance
-            cls.objects.get(
-                **{audience_kwarg: audience},
-                content=initial_message,
-                hub_initiated=True,
+        # the hash finds candidates through the (session, content_hash) index, content guards against collisions
+        return cls.objects.filter(
+            **{audience_kwarg: audience},
+            content_hash=compute_content_hash(initial_message),
+            content=initial_message,
+            hub_initiated=True,
+        ).exists()
+
+    @classmethod
+    def initial_message_conflicts_with_session(
+        cls, initial_message: str, session: "IndividualSession | GroupSession", session_initial_message: str
+    ) -> bool:
+        if session_initial_message and session_initial_message != initial_message:
+            logger.error(
+                f"Unexpectedly got new initial_message for existing session {session}. "
+                f"New message: '{initial_message}'. Not persisting new initial_message."
             )
             return True
-        except cls.DoesNotExist:
-            return False
+        return False
 
     @classmethod
     def persist_initial_message_if_necessary(
@@ -261,11 +373,9 @@ class BaseChatTranscript(ModelBase):
 
         if cls.initial_message_exists(initial_message, audience):
             return
-        if not created_session and session.initial_message and session.initial_message != initial_message:
-            logger.error(
-                f"Unexpectedly got new initial_message for existing session {session}. "
-                f"New message: '{initial_message}'. Not persisting new initial_message."
-            )
+        if not created_session and cls.initial_message_conflicts_with_session(
+            initial_message, session, session.initial_message
+        ):
             return
 
         # either the session is new for a new initial message
@@ -280,6 +390,23 @@ class BaseChatTranscript(ModelBase):
 class IndividualChatTranscript(BaseChatTranscript):
     session = models.ForeignKey(IndividualSession, on_delete=models.CASCADE, related_name="transcripts")
 
+    class Meta(BaseChatTranscript.Meta):
+        indexes = [
+            models.Index(
+                fields=["session", "content_hash"],
+                condition=models.Q(hub_initiated=True),
+                name="chat_ind_transcript_hub_hash",
+            ),
+            # chat history: the session's transcripts that were not flagged, in order
+            models.Index(
+                fields=["session", "created_at"],
+                condition=~models.Q(moderation_status=BaseChatTranscript.ModerationStatus.FLAGGED),
+                name="chat_ind_transcript_history",
+            ),
+            # the latest user message of the session
+            models.Index(fields=["session", "role", "-created_at"], name="chat_ind_transcript_role"),
+        ]
+
     @property
     def week_number(self) -> int:
         return self.session.week_number
@@ -294,6 +421,23 @@ class GroupChatTranscript(BaseChatTranscript):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="group_transcripts", null=True, blank=True)
     assistant_strategy_phase = models.CharField(max_length=20, choices=GroupStrategyPhase.choices, null=True)
 
+    class Meta(BaseChatTranscript.Meta):
+        indexes = [
+            models.Index(
+                fields=["session", "content_hash"],
+                condition=models.Q(hub_initiated=True),
+                name="chat_grp_transcript_hub_hash",
+            ),
+            # chat history: the session's transcripts that were not flagged, in order
+            models.Index(
+                fields=["session", "created_at"],
+                condition=~models.Q(moderation_status=BaseChatTranscript.ModerationStatus.FLAGGED),
+                name="chat_grp_transcript_history",
+            ),
+            # the latest user message of the session
+            models.Index(fields=["session", "role", "-created_at"], name="chat_grp_transcript_role"),
+        ]
+
     @property
     def week_number(self) -> int:
         return self.session.week_number
@@ -413,7 +557,9 @@ class BasePipelineRecord(ModelBase):
     message = models.TextField(blank=True, null=True)
     processed_message = models.TextField(blank=True, null=True)
     response = models.TextField(blank=True, null=True)
-    instruction_prompt = models.TextField(blank=True, null=True)
+    instruction_prompt_blob = ContentBlobField()
+    instruction_prompt_inline = models.TextField(blank=True, null=True, editable=False, db_column="instruction_prompt")
+    instruction_prompt = content_blob_property("instruction_prompt_blob", "instruction_prompt_inline")
     validated_message = models.TextField(blank=True, null=True)
     error_log = models.TextField(blank=True, null=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -423,7 +569,9 @@ class BasePipelineRecord(ModelBase):
     db_load_latency = models.DurationField(default=timedelta(0))
     llm_latency = models.DurationField(default=timedelta(0))
     shorten_count = models.IntegerField(default=0)
-    chat_history = models.TextField(blank=True, null=True)
+    chat_history_blob = ContentBlobField()
+    chat_history_inline = models.TextField(blank=True, null=True, editable=False, db_column="chat_history")
+    chat_history = content_blob_property("chat_history_blob", "chat_history_inline")
     gpt_model = models.CharField(max_length=100, null=True, blank=True, help_text="The model to use for only test user")
     prompt_tokens = models.IntegerField(blank=True, null=True)
     completion_tokens = models.IntegerField(blank=True, null=True)
@@ -454,6 +602,9 @@ class IndividualPipelineRecord(BasePipelineRecord):
     # is removed from the group
     is_for_group_direct_messaging = models.BooleanField(default=False)
 
+    class Meta(BasePipelineRecord.Meta):
+        indexes = [models.Index(fields=["user", "-created_at"], name="chat_ind_record_user_created")]
+
     def __str__(self):
         return f"IndividualPipelineRecord({self.user}, {self.run_id})"
 
@@ -476,6 +627,16 @@ class GroupPipelineRecord(BasePipelineRecord):
     transcript = models.ForeignKey(
         GroupChatTranscript, on_delete=models.CASCADE, related_name="pipeline_records", null=True
     )
+    # a response precomputed while waiting for the scheduled action, along with the phase it was generated for
+    # and the id of the group's latest transcript when it was generated. It is only used if both still match
+    # when the action fires.
+    precomputed_strategy_phase = models.CharField(
+        max_length=20, choices=GroupStrategyPhase.choices, blank=True, null=True
+    )
+    precomputed_high_water_mark = models.BigIntegerField(blank=True, null=True)
+
+    class Meta(BasePipelineRecord.Meta):
+        indexes = [models.Index(fields=["group", "-created_at"], name="chat_grp_record_group_created")]
 
     @property
     def is_test(self):
@@ -0,0 +1,76 @@
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import reverse
+
+REPLICA_DB_ALIAS = "replica"
+REPLICA_PINNED_COOKIE = "replica_pinned"
+
+_reading_from_replica: ContextVar[bool] = ContextVar("reading_from_replica", default=False)
+
+
+class read_from_replica(ContextDecorator):
+    """
+    Sends the reads of chat and tester models made inside it to the replica database (when one is configured),
+    for read-only workloads that would otherwise compete with the ingest pipeline on the primary.
+    """
+
+    def __enter__(self):
+        self._token = _reading_from_replica.set(True)
+
+    def __exit__(self, *exc):
+        _reading_from_replica.reset(self._token)
+
+
+class ReplicaRouter:
+    """
+    Routes reads inside read_from_replica to the replica database, and everything else to the primary. Without a
+    "replica" database configured, every query goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _reading_from_replica.get()
+            and REPLICA_DB_ALIAS in settings.DATABASES
+            and model._meta.app_label in settings.REPLICA_READ_APPS
+            # reads inside a transaction on the primary must see its writes
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class AdminReplicaMiddleware:
+    """
+    Serves admin page views from the replica. After an admin edit, the editor's reads stay on the primary for
+    REPLICA_STICKY_SECONDS so that they see their own changes while the replica catches up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith(reverse("admin:index")):
+            return self.get_response(request)
+        if request.method not in ("GET", "HEAD"):
+            response = self.get_response(request)
+            response.set_cookie(
+                REPLICA_PINNED_COOKIE, "1", max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax"
+            )
+            return response
+        if REPLICA_PINNED_COOKIE in request.COOKIES:
+            return self.get_response(request)
+        with read_from_replica():
+            return self.get_response(request)
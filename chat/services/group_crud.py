@@ -3,6 +3,8 @@ import re
 from django.db.models import Q
 
 from chat.serializers import GroupIncomingMessage, GroupIncomingInitialMessage
+from chat.services.individual_crud import get_transcript_len_cutoff
+from chat.services.lookup_cache import group_prompt_activities
 
 
 from ..models import (
@@ -217,11 +219,9 @@ def load_instruction_prompt(session: GroupSession, strategy_phase: GroupStrategy
     else:
         # Treat initial and reminder as the same for the purpose of loading the prompt
         message_type = MessageType.INITIAL if session.message_type == MessageType.REMINDER else session.message_type
-        try:
-            activity = GroupPrompt.objects.get(
-                week=week, message_type=message_type, strategy_type=strategy_phase
-            ).activity
-        except GroupPrompt.DoesNotExist as err:
+        activity = group_prompt_activities.get((week, message_type, strategy_phase))
+        if activity is None:
+            err = GroupPrompt.DoesNotExist("GroupPrompt matching query does not exist.")
             logger.error(
                 f"Prompt not found for week {week}, message_type {message_type} and type {strategy_phase}: {err}"
             )
@@ -255,22 +255,41 @@ def _sanitize_name(name: str) -> str:
 def load_group_chat_history(session: GroupSession) -> tuple[list[dict], str]:
     """
     Loads the chat history for a group session.
+
+    Only the most recent transcripts (see get_transcript_len_cutoff) are loaded, in a single query with
+    their senders, so the prompt and query cost stay bounded as a group chats through the week.
     """
     if session.message_type == MessageType.REMINDER:
         # if we are in a reminder session, we also need to load messages
         # from the associated initial session, because the reminder is about the initial message
         # and the chatbot should know about the full conversation
-        transcripts = GroupChatTranscript.objects.filter(
-            Q(
-                session__group=session.group,
-                session__week_number=session.week_number,
-                session__message_type=MessageType.INITIAL,
-            )
-            | Q(session=session)
-        ).order_by("created_at")
+        session_filter = Q(
+            session__group=session.group,
+            session__week_number=session.week_number,
+            session__message_type=MessageType.INITIAL,
+        ) | Q(session=session)
     else:
-        transcripts = GroupChatTranscript.objects.filter(session=session).order_by("created_at")
-    latest_user_transcript = transcripts.filter(role=BaseChatTranscript.Role.USER).last()
+        session_filter = Q(session=session)
+    cutoff = get_transcript_len_cutoff()
+    # fetch newest first so the window is applied in SQL, with one extra row for the latest user message
+    # which is returned separately rather than as part of the history
+    transcripts: list[GroupChatTranscript] = list(
+        GroupChatTranscript.objects.filter(session_filter)
+        .exclude(moderation_status=BaseChatTranscript.ModerationStatus.FLAGGED)
+        .select_related("sender")
+        .order_by("-created_at", "-id")[: cutoff + 1]
+    )
+    transcripts.reverse()
+    latest_user_transcript = next((t for t in reversed(transcripts) if t.role == BaseChatTranscript.Role.USER), None)
+    if latest_user_transcript is None and len(transcripts) > cutoff:
+        # rare: the whole window is assistant messages, so the latest user message is older than the window
+        latest_user_transcript = (
+            GroupChatTranscript.objects.filter(session_filter, role=BaseChatTranscript.Role.USER)
+            .exclude(moderation_status=BaseChatTranscript.ModerationStatus.FLAGGED)
+            .select_related("sender")
+            .order_by("-created_at", "-id")
+            .first()
+        )
     assistant_name = (
         latest_user_transcript.sender.school_mascot
         if latest_user_transcript and latest_user_transcript.sender
@@ -278,9 +297,7 @@ def load_group_chat_history(session: GroupSession) -> tuple[list[dict], str]:
     )
     history: list[dict] = []
     for t in transcripts:
-        if (
-            latest_user_transcript and t.id == latest_user_transcript.id  # type: ignore[attrib]
-        ) or t.moderation_status == BaseChatTranscript.ModerationStatus.FLAGGED:
+        if latest_user_transcript and t.id == latest_user_transcript.id:  # type: ignore[attrib]
             continue
 
         if t.role == BaseChatTranscript.Role.USER:
@@ -297,6 +314,7 @@ def load_group_chat_history(session: GroupSession) -> tuple[list[dict], str]:
                 "name": sender_name,
             }
         )
+    history = history[-cutoff:]
     latest_sender_message = (
         f"[Sender/User Name: {latest_user_transcript.sender.name}]: " + latest_user_transcript.content
         if latest_user_transcript and latest_user_transcript.sender
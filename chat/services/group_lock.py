@@ -0,0 +1,131 @@
+import logging
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+import redis
+from django.conf import settings
+
+from ..models import Group
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# only delete the lease if we still own it, otherwise we could release a lease another worker acquired
+# after ours expired
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_MIN_RETRY_SLEEP_SECONDS = 0.01
+_MAX_RETRY_SLEEP_SECONDS = 0.1
+
+
+class StaleGroupLeaseError(Exception):
+    """Raised when a write is attempted with a fencing token older than one already used for the group."""
+
+
+@dataclass(frozen=True)
+class GroupLease:
+    group_id: str
+    owner: str
+    fencing_token: int
+
+
+def _lease_key(group_id: str) -> str:
+    return f"group-lease:{group_id}"
+
+
+def _fence_key(group_id: str) -> str:
+    return f"group-lease:{group_id}:fence"
+
+
+def _next_fencing_token(client: redis.Redis, group_id: str) -> int:
+    token = client.incr(_fence_key(group_id))
+    if token == 1:
+        # the counter is new (first lease for the group, or redis lost its data). Seed it past anything
+        # already written to the database so that a reset counter cannot be rejected as stale forever.
+        db_token = Group.objects.filter(id=group_id).values_list("lease_fencing_token", flat=True).first()
+        if db_token:
+            token = client.incrby(_fence_key(group_id), db_token)
+    return token
+
+
+def _acquire(client: redis.Redis, group_id: str) -> GroupLease | None:
+    owner = uuid.uuid4().hex
+    ttl_ms = settings.GROUP_INGEST_LOCK_TTL_SECONDS * 1000
+    deadline = time.monotonic() + settings.GROUP_INGEST_LOCK_WAIT_SECONDS
+    sleep_seconds = _MIN_RETRY_SLEEP_SECONDS
+    while True:
+        if client.set(_lease_key(group_id), owner, nx=True, px=ttl_ms):
+            return GroupLease(group_id=group_id, owner=owner, fencing_token=_next_fencing_token(client, group_id))
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(sleep_seconds * random.uniform(0.5, 1.5))
+        sleep_seconds = min(sleep_seconds * 2, _MAX_RETRY_SLEEP_SECONDS)
+
+
+def _release(client: redis.Redis, lease: GroupLease):
+    try:
+        released = client.eval(_RELEASE_SCRIPT, 1, _lease_key(lease.group_id), lease.owner)
+        if not released:
+            logger.warning(
+                f"Group lease for group {lease.group_id} (token {lease.fencing_token}) expired before release."
+            )
+    except redis.RedisError:
+        logger.exception(f"Failed to release group lease for group {lease.group_id}")
+
+
+@contextmanager
+def group_lease(group_id: str) -> Iterator[GroupLease | None]:
+    """
+    Serializes group ingest and scheduling for a single group across workers, while work for
+    different groups continues in parallel.
+
+    Yields the held GroupLease, or None when locking is disabled. If redis is unavailable or the
+    lease cannot be obtained in time we fail open and yield None rather than drop the message.
+    """
+    if not settings.GROUP_INGEST_LOCK_ENABLED:
+        yield None
+        return
+
+    client = get_redis_client()
+    lease: GroupLease | None = None
+    try:
+        lease = _acquire(client, group_id)
+        if lease is None:
+            logger.warning(
+                f"Timed out after {settings.GROUP_INGEST_LOCK_WAIT_SECONDS}s waiting for lease on group {group_id}. "
+                "Proceeding without it."
+            )
+    except redis.RedisError:
+        logger.exception(f"Failed to acquire group lease for group {group_id}. Proceeding without it.")
+
+    try:
+        yield lease
+    finally:
+        if lease:
+            _release(client, lease)
+
+
+def check_fencing_token(lease: GroupLease | None):
+    """
+    Records the lease's fencing token against the group, rejecting the write if a newer lease has
+    already written. Must be called inside the transaction performing the guarded writes so that the
+    check and the writes commit (or roll back) together.
+    """
+    if lease is None:
+        return
+    updated = Group.objects.filter(id=lease.group_id, lease_fencing_token__lte=lease.fencing_token).update(
+        lease_fencing_token=lease.fencing_token
+    )
+    if not updated:
+        raise StaleGroupLeaseError(
+            f"Group lease token {lease.fencing_token} for group {lease.group_id} has been superseded by a newer lease."
+        )
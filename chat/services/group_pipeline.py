@@ -21,6 +21,8 @@ from chat.services.group_crud import (
     load_instruction_prompt,
     ingest_request,
 )
+from chat.services.group_lock import GroupLease, check_fencing_token, group_lease
+from chat.services.lookup_cache import group_strategy_phase_configs
 from chat.services.moderation import moderate_message
 from chat.services.send import send_message_to_participant_group
 
@@ -44,9 +46,42 @@ logger = logging.getLogger(__name__)
 _FALLBACK_DELAY_WITHOUT_CONFIG_SECONDS = 60
 
 
+_PRECOMPUTED_FIELDS = [
+    "prompt_tokens",
+    "completion_tokens",
+    "gpt_model",
+    "processed_message",
+    "llm_latency",
+    # instruction_prompt and chat_history are stored as blobs, see content_blob_property
+    "instruction_prompt_blob",
+    "instruction_prompt_inline",
+    "chat_history_blob",
+    "chat_history_inline",
+    "response",
+    "shorten_count",
+    "validated_message",
+    "precomputed_strategy_phase",
+    "precomputed_high_water_mark",
+    "updated_at",
+]
+
+
+def _is_latest_record_for_group(record: GroupPipelineRecord) -> bool:
+    return record == GroupPipelineRecord.objects.filter(group=record.group).order_by("-created_at").first()
+
+
+def _latest_group_transcript_id(record: GroupPipelineRecord) -> int | None:
+    # any transcript written for the group (user or assistant) changes the history a response is built from
+    return (
+        GroupChatTranscript.objects.filter(session__group=record.group)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+
+
 def _newer_user_messages_exist(record: GroupPipelineRecord):
-    latest_record_for_group = GroupPipelineRecord.objects.filter(group=record.group).order_by("-created_at").first()
-    newer_message_exists = record != latest_record_for_group
+    newer_message_exists = not _is_latest_record_for_group(record)
     if newer_message_exists:
         record.status = GroupPipelineRecord.StageStatus.PROCESS_SKIPPED
         record.save()
@@ -95,25 +130,27 @@ def _get_send_message_delay_seconds(user_chat_transcript: GroupChatTranscript) -
     if user_chat_transcript.session.group.is_test:
         # enable faster testing
         return 1
-    try:
-        phase_config = GroupStrategyPhaseConfig.objects.get(
-            group_strategy_phase=user_chat_transcript.session.current_strategy_phase
-        )
-        if phase_config.min_wait_seconds == phase_config.max_wait_seconds:
-            return phase_config.min_wait_seconds
-        return random.randint(phase_config.min_wait_seconds, phase_config.max_wait_seconds)
-    except GroupStrategyPhaseConfig.DoesNotExist:
+    phase_config: GroupStrategyPhaseConfig | None = group_strategy_phase_configs.get(
+        user_chat_transcript.session.current_strategy_phase
+    )
+    if phase_config is None:
         logger.error(
             f"Group strategy phase config not found for phase '{user_chat_transcript.session.current_strategy_phase}'"
         )
         return _FALLBACK_DELAY_WITHOUT_CONFIG_SECONDS
+    if phase_config.min_wait_seconds == phase_config.max_wait_seconds:
+        return phase_config.min_wait_seconds
+    return random.randint(phase_config.min_wait_seconds, phase_config.max_wait_seconds)
 
 
 def _clear_existing_and_schedule_group_action(
-    last_user_chat_transcript: GroupChatTranscript, record: GroupPipelineRecord
+    last_user_chat_transcript: GroupChatTranscript, record: GroupPipelineRecord, lease: GroupLease | None = None
 ):
     delay_sec = _get_send_message_delay_seconds(last_user_chat_transcript)
     with transaction.atomic():
+        # reject the write if another worker has taken over the group's lease since ours was granted
+        check_fencing_token(lease)
+
         # delete existing tasks
         GroupScheduledTaskAssociation.objects.filter(group=record.group).delete()
 
@@ -130,6 +167,15 @@ def _clear_existing_and_schedule_group_action(
         GroupScheduledTaskAssociation.objects.create(group=record.group, task=task)
         record.status = GroupPipelineRecord.StageStatus.SCHEDULED_ACTION
         record.save()
+        if settings.GROUP_PRECOMPUTE_ENABLED:
+            # lower priority than inbound messages, the scheduled action computes the response itself if
+            # the precompute has not run by then
+            transaction.on_commit(
+                lambda: precompute_group_action.apply_async(
+                    kwargs={"run_id": str(record.run_id), "user_chat_transcript_id": last_user_chat_transcript.id},
+                    priority=1,
+                )
+            )
     logger.info(
         f"Scheduled response for group {record.group.id} "
         f"(phase {last_user_chat_transcript.session.current_strategy_phase}), "
@@ -138,7 +184,48 @@ def _clear_existing_and_schedule_group_action(
     )
 
 
-def _compute_and_validate_message_to_send(
+def _should_skip_reminder(session: GroupSession) -> bool:
+    return (
+        session.message_type == GroupPromptMessageType.SUMMARY
+        or session.all_participants_responded
+        or session.reminder_sent
+    )
+
+
+def _should_skip_summary(session: GroupSession) -> bool:
+    return (
+        session.message_type == GroupPromptMessageType.SUMMARY
+        or session.fewer_than_three_participants_responded
+        or session.summary_sent
+    )
+
+
+def _get_next_strategy_phase(session: GroupSession) -> GroupStrategyPhase:
+    """
+    Figures out what action should be taken given the session's current strategy phase.
+    """
+    next_strategy_phase: GroupStrategyPhase
+    match session.current_strategy_phase:
+        case GroupStrategyPhase.BEFORE_AUDIENCE:
+            next_strategy_phase = GroupStrategyPhase.AUDIENCE  # type: ignore[assignment]
+        case GroupStrategyPhase.AFTER_AUDIENCE:
+            next_strategy_phase = (
+                GroupStrategyPhase.FOLLOWUP if _should_skip_reminder(session) else GroupStrategyPhase.REMINDER  # type: ignore[assignment]
+            )
+        case GroupStrategyPhase.AFTER_REMINDER:
+            next_strategy_phase = GroupStrategyPhase.FOLLOWUP  # type: ignore[assignment]
+        case GroupStrategyPhase.AFTER_FOLLOWUP:
+            next_strategy_phase = (
+                GroupStrategyPhase.AFTER_SUMMARY if _should_skip_summary(session) else GroupStrategyPhase.SUMMARY  # type: ignore[assignment]
+            )
+        case GroupStrategyPhase.AFTER_SUMMARY:
+            raise ValueError(
+                f"No messages to be sent in strategy phase {session.current_strategy_phase}. How did we get here?"
+            )
+    return next_strategy_phase
+
+
+def _generate_message_to_send(
     record: GroupPipelineRecord, session: GroupSession, next_strategy_phase: GroupStrategyPhase
 ):
     # generate response
@@ -164,10 +251,32 @@ def _compute_and_validate_message_to_send(
     # ensure 320 characters or less
     record.validated_message = ensure_within_character_limit(record)
 
+
+def _compute_and_validate_message_to_send(
+    record: GroupPipelineRecord, session: GroupSession, next_strategy_phase: GroupStrategyPhase
+):
+    if _precomputed_message_is_current(record, next_strategy_phase):
+        logger.info(
+            f"Using precomputed {next_strategy_phase} response for group {record.group.id}, run_id {record.run_id}"
+        )
+    else:
+        _generate_message_to_send(record, session, next_strategy_phase)
     record.status = GroupPipelineRecord.StageStatus.PROCESS_PASSED
     record.save()
 
 
+def _precomputed_message_is_current(record: GroupPipelineRecord, next_strategy_phase: GroupStrategyPhase) -> bool:
+    """
+    A precomputed response can only be sent if it was generated for the same phase and no transcripts
+    have been written for the group since.
+    """
+    return (
+        record.precomputed_strategy_phase == next_strategy_phase
+        and record.precomputed_high_water_mark is not None
+        and record.precomputed_high_water_mark == _latest_group_transcript_id(record)
+    )
+
+
 def _save_and_send_message(record: GroupPipelineRecord, session: GroupSession, next_strategy_phase: GroupStrategyPhase):
     """
     Stage 5: Retrieve the most recent response and send it to the participant.
@@ -220,27 +329,33 @@ def handle_inbound_group_message(
     record: GroupPipelineRecord | None = None
     try:
         # ingest
-        record, user_chat_transcript = _ingest(group_id, group_incoming_message, request_recieved_at)
+        with group_lease(group_id):
+            record, user_chat_transcript = _ingest(group_id, group_incoming_message, request_recieved_at)
 
         # moderate
         _moderate(record, user_chat_transcript)
         if record.status == GroupPipelineRecord.StageStatus.MODERATION_BLOCKED:
             return
 
-        # handle changing current session if necessary
-        #   all phases revert back to BEFORE_AUDIENCE when a message is received except for AFTER_AUDIENCE,
-        #   which stays on itself while messages are still being received
-        if user_chat_transcript.session.current_strategy_phase not in [
-            GroupStrategyPhase.BEFORE_AUDIENCE,
-            GroupStrategyPhase.AFTER_AUDIENCE,
-        ]:
-            user_chat_transcript.session.current_strategy_phase = GroupStrategyPhase.BEFORE_AUDIENCE
-            user_chat_transcript.session.save()
-
-        # schedule response
-        if _newer_user_messages_exist(record):
-            return
-        _clear_existing_and_schedule_group_action(user_chat_transcript, record)
+        with group_lease(group_id) as lease:
+            if lease:
+                # the previous lease holder may have moved the session to another phase since we ingested
+                user_chat_transcript.session.refresh_from_db(fields=["current_strategy_phase"])
+
+            # handle changing current session if necessary
+            #   all phases revert back to BEFORE_AUDIENCE when a message is received except for AFTER_AUDIENCE,
+            #   which stays on itself while messages are still being received
+            if user_chat_transcript.session.current_strategy_phase not in [
+                GroupStrategyPhase.BEFORE_AUDIENCE,
+                GroupStrategyPhase.AFTER_AUDIENCE,
+            ]:
+                user_chat_transcript.session.current_strategy_phase = GroupStrategyPhase.BEFORE_AUDIENCE
+                user_chat_transcript.session.save()
+
+            # schedule response
+            if _newer_user_messages_exist(record):
+                return
+            _clear_existing_and_schedule_group_action(user_chat_transcript, record, lease)
     except Exception as exc:
         if record:
             record.status = GroupPipelineRecord.StageStatus.FAILED
@@ -262,40 +377,8 @@ def take_action_on_group(run_id: str, user_chat_transcript_id: int):
         if _newer_user_messages_exist(record):
             return
 
-        def should_skip_reminder(session) -> bool:
-            return (
-                session.message_type == GroupPromptMessageType.SUMMARY
-                or session.all_participants_responded
-                or session.reminder_sent
-            )
-
-        def should_skip_summary(session) -> bool:
-            return (
-                session.message_type == GroupPromptMessageType.SUMMARY
-                or session.fewer_than_three_participants_responded
-                or session.summary_sent
-            )
-
         # figure out what action we should take
-        next_strategy_phase: GroupStrategyPhase
-        match session.current_strategy_phase:
-            case GroupStrategyPhase.BEFORE_AUDIENCE:
-                next_strategy_phase = GroupStrategyPhase.AUDIENCE  # type: ignore[assignment]
-            case GroupStrategyPhase.AFTER_AUDIENCE:
-                next_strategy_phase = (
-                    GroupStrategyPhase.FOLLOWUP if should_skip_reminder(session) else GroupStrategyPhase.REMINDER  # type: ignore[assignment]
-                )
-            case GroupStrategyPhase.AFTER_REMINDER:
-                next_strategy_phase = GroupStrategyPhase.FOLLOWUP  # type: ignore[assignment]
-            case GroupStrategyPhase.AFTER_FOLLOWUP:
-                next_strategy_phase = (
-                    GroupStrategyPhase.AFTER_SUMMARY if should_skip_summary(session) else GroupStrategyPhase.SUMMARY  # type: ignore[assignment]
-                )
-            case GroupStrategyPhase.AFTER_SUMMARY:
-                raise ValueError(
-                    f"No messages to be sent in strategy phase {user_chat_transcript.session.current_strategy_phase}. "
-                    "How did we get here?"
-                )
+        next_strategy_phase = _get_next_strategy_phase(session)
 
         # take the action
         if next_strategy_phase == GroupStrategyPhase.AFTER_SUMMARY:
@@ -312,18 +395,19 @@ def take_action_on_group(run_id: str, user_chat_transcript_id: int):
             _save_and_send_message(record, session, next_strategy_phase)
 
         # move to the next phase
-        match next_strategy_phase:
-            case GroupStrategyPhase.AUDIENCE:
-                session.current_strategy_phase = GroupStrategyPhase.AFTER_AUDIENCE
-            case GroupStrategyPhase.REMINDER:
-                session.current_strategy_phase = GroupStrategyPhase.AFTER_REMINDER
-            case GroupStrategyPhase.FOLLOWUP:
-                session.current_strategy_phase = GroupStrategyPhase.AFTER_FOLLOWUP
-            case GroupStrategyPhase.SUMMARY | GroupStrategyPhase.AFTER_SUMMARY:
-                session.current_strategy_phase = GroupStrategyPhase.AFTER_SUMMARY
-        session.save()
-        if session.current_strategy_phase != GroupStrategyPhase.AFTER_SUMMARY:
-            _clear_existing_and_schedule_group_action(user_chat_transcript, record)
+        with group_lease(record.group.id) as lease:
+            match next_strategy_phase:
+                case GroupStrategyPhase.AUDIENCE:
+                    session.current_strategy_phase = GroupStrategyPhase.AFTER_AUDIENCE
+                case GroupStrategyPhase.REMINDER:
+                    session.current_strategy_phase = GroupStrategyPhase.AFTER_REMINDER
+                case GroupStrategyPhase.FOLLOWUP:
+                    session.current_strategy_phase = GroupStrategyPhase.AFTER_FOLLOWUP
+                case GroupStrategyPhase.SUMMARY | GroupStrategyPhase.AFTER_SUMMARY:
+                    session.current_strategy_phase = GroupStrategyPhase.AFTER_SUMMARY
+            session.save()
+            if session.current_strategy_phase != GroupStrategyPhase.AFTER_SUMMARY:
+                _clear_existing_and_schedule_group_action(user_chat_transcript, record, lease)
 
         logger.info(
             f"Group action complete for group {record.group.id}, sender {record.user.id}, run_id {record.run_id}"
@@ -334,3 +418,46 @@ def take_action_on_group(run_id: str, user_chat_transcript_id: int):
         record.save()
         logger.exception(f"Action on group failed for group {record.group.id}")
         raise
+
+
+@shared_task(rate_limit=settings.GROUP_PRECOMPUTE_RATE_LIMIT)
+def precompute_group_action(run_id: str, user_chat_transcript_id: int):
+    """
+    Generates the response for a scheduled group action ahead of time, so that it is ready when the action fires.
+
+    This is best effort: anything that stops the precompute leaves the record untouched, and the scheduled
+    action generates the response itself.
+    """
+    record = GroupPipelineRecord.objects.select_related("group", "user").get(run_id=run_id)
+    try:
+        if record.status != GroupPipelineRecord.StageStatus.SCHEDULED_ACTION or not _is_latest_record_for_group(record):
+            return
+        session = GroupChatTranscript.objects.select_related("session").get(id=user_chat_transcript_id).session
+        if session.current_strategy_phase == GroupStrategyPhase.AFTER_SUMMARY:
+            return
+        next_strategy_phase = _get_next_strategy_phase(session)
+        if next_strategy_phase == GroupStrategyPhase.AFTER_SUMMARY:
+            return
+
+        high_water_mark = _latest_group_transcript_id(record)
+        _generate_message_to_send(record, session, next_strategy_phase)
+        record.precomputed_strategy_phase = next_strategy_phase
+        record.precomputed_high_water_mark = high_water_mark
+        with transaction.atomic():
+            # lock the record so that the scheduled action cannot act on it while we store the candidate,
+            # and drop the candidate if the action has already fired or a new message arrived meanwhile
+            still_scheduled = (
+                GroupPipelineRecord.objects.select_for_update()
+                .filter(pk=record.pk, status=GroupPipelineRecord.StageStatus.SCHEDULED_ACTION)
+                .exists()
+            )
+            if not still_scheduled or _latest_group_transcript_id(record) != high_water_mark:
+                logger.info(f"Discarding stale precomputed response for group {record.group.id}, run_id {run_id}")
+                return
+            record.save(update_fields=_PRECOMPUTED_FIELDS)
+        logger.info(
+            f"Precomputed {next_strategy_phase} response for group {record.group.id}, "
+            f"sender {record.user.id}, run_id {run_id}"
+        )
+    except Exception:
+        logger.exception(f"Precomputing group action failed for group {record.group.id}, run_id {run_id}")
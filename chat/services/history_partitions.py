@@ -0,0 +1,127 @@
+import gzip
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from celery import shared_task
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import GroupChatTranscript, GroupPipelineRecord, IndividualChatTranscript, IndividualPipelineRecord
+
+logger = logging.getLogger(__name__)
+
+# historical tables partitioned by month of history_date (see migration 0083). The live tables are not
+# partitioned: postgres requires the partition key in every primary key and unique constraint, which would
+# break the single column primary keys that pipeline records reference transcripts by, and run_id uniqueness.
+PARTITIONED_HISTORY_MODELS = [
+    model.history.model
+    for model in [IndividualChatTranscript, GroupChatTranscript, IndividualPipelineRecord, GroupPipelineRecord]
+]
+
+
+@dataclass
+class HistoryPartition:
+    name: str
+    # None for the partition that holds everything before the table was partitioned
+    lower: datetime | None
+    # None for the default partition, which holds rows outside every monthly partition
+    upper: datetime | None
+
+    @property
+    def is_default(self) -> bool:
+        return self.upper is None
+
+
+def month_start(value: datetime, months: int = 0) -> datetime:
+    """The start (in UTC) of the month `months` after the one `value` falls in."""
+    value = value.astimezone(dt_timezone.utc)
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _parse_bound(bound: str) -> datetime | None:
+    if bound == "MINVALUE":
+        return None
+    return datetime.fromisoformat(bound.strip("'"))
+
+
+def list_history_partitions(table: str) -> list[HistoryPartition]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        if bound == "DEFAULT":
+            partitions.append(HistoryPartition(name, None, None))
+            continue
+        # e.g. FOR VALUES FROM ('2025-01-01 00:00:00+00') TO ('2025-02-01 00:00:00+00')
+        lower, upper = bound.removeprefix("FOR VALUES FROM (").removesuffix(")").split(") TO (")
+        partitions.append(HistoryPartition(name, _parse_bound(lower), _parse_bound(upper)))
+    return sorted(partitions, key=lambda p: (p.is_default, p.upper or datetime.max.replace(tzinfo=dt_timezone.utc)))
+
+
+@shared_task
+def create_history_partitions(months_ahead: int | None = None) -> list[str]:
+    """
+    Creates the monthly partitions of the history tables up to HISTORY_PARTITION_MONTHS_AHEAD months ahead,
+    to be scheduled daily. History written past the last partition goes to the default partition, which
+    has to be emptied before a partition covering those rows can be created.
+    """
+    if months_ahead is None:
+        months_ahead = settings.HISTORY_PARTITION_MONTHS_AHEAD
+    now = timezone.now()
+    created = []
+    for model in PARTITIONED_HISTORY_MODELS:
+        table = model._meta.db_table
+        covered_until = max(
+            (p.upper for p in list_history_partitions(table) if not p.is_default),
+            default=month_start(now),
+        )
+        for months in range(months_ahead + 1):
+            start = month_start(now, months)
+            if start < covered_until:
+                continue
+            name = f"{table}_p{start:%Y%m}"
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TABLE {connection.ops.quote_name(name)} PARTITION OF {connection.ops.quote_name(table)} "
+                    "FOR VALUES FROM (%s) TO (%s)",
+                    [start, month_start(start, 1)],
+                )
+            created.append(name)
+    logger.info(f"Created history partitions: {created}")
+    return created
+
+
+def archive_history_partition(table: str, partition: HistoryPartition, output_dir: str) -> tuple[str, int]:
+    """
+    Detaches the partition, so queries of the history table no longer see it, then exports it to a gzipped
+    csv file in output_dir and drops it. Returns the path of the file and the number of rows exported.
+
+    If the export fails, the partition is left detached (and can be attached again).
+    """
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(partition.name)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{partition.name}.csv.gz")
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {qn(partition.name)}")
+        rows = cursor.fetchone()[0]
+        with gzip.open(path, "wb") as archive:
+            cursor.copy_expert(f"COPY {qn(partition.name)} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+        cursor.execute(f"DROP TABLE {qn(partition.name)}")
+    logger.info(f"Archived {rows} rows of {partition.name} to {path}")
+    return path, rows
@@ -0,0 +1,121 @@
+import logging
+from dataclasses import asdict, dataclass
+from typing import Iterator
+
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_POLICY_KEYS = {"max_age_days", "first_and_last"}
+
+
+@dataclass
+class HistoryPruneReport:
+    model: str
+    rows: int = 0
+    # size of the deleted rows' data (pg_column_size), reclaimed once the table is vacuumed
+    bytes: int = 0
+
+
+def _retention_policy(label: str) -> dict:
+    policy = settings.HISTORY_RETENTION_POLICIES[label]
+    if not policy or set(policy) - _POLICY_KEYS:
+        raise ImproperlyConfigured(f"History retention policy for {label} must only use the keys {_POLICY_KEYS}")
+    return policy
+
+
+def _expired_batches(history_model: type[models.Model], cutoff, batch_size: int) -> Iterator[list[int]]:
+    last_history_id = 0
+    while True:
+        batch = list(
+            history_model.objects.filter(history_date__lt=cutoff, history_id__gt=last_history_id)
+            .order_by("history_id")
+            .values_list("history_id", flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_history_id = batch[-1]
+
+
+def _intermediate_version_batches(history_model: type[models.Model], cutoff, batch_size: int) -> Iterator[list[int]]:
+    """Every version of each object except its first and last, for batch_size objects at a time."""
+    history = history_model.objects.all()
+    if cutoff is not None:
+        # versions older than the cutoff are pruned regardless, so first and last are picked from the rest
+        history = history.filter(history_date__gte=cutoff)
+    last_object_id = None
+    while True:
+        objects = history if last_object_id is None else history.filter(id__gt=last_object_id)
+        object_ids = list(objects.order_by("id").values_list("id", flat=True).distinct()[:batch_size])
+        if not object_ids:
+            return
+        # history ids increase with each version of an object
+        versions = (
+            history.filter(id__in=object_ids)
+            .values("id")
+            .annotate(first=models.Min("history_id"), last=models.Max("history_id"))
+        )
+        kept = {v["first"] for v in versions} | {v["last"] for v in versions}
+        intermediate = list(
+            history.filter(id__in=object_ids).exclude(history_id__in=kept).values_list("history_id", flat=True)
+        )
+        for start in range(0, len(intermediate), batch_size):
+            yield intermediate[start : start + batch_size]
+        last_object_id = object_ids[-1]
+
+
+def _rows_bytes(history_model: type[models.Model], history_ids: list[int]) -> int:
+    table = connection.ops.quote_name(history_model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(SUM(pg_column_size(h.*)), 0) FROM {table} h WHERE h.history_id = ANY(%s)",
+            [history_ids],
+        )
+        return cursor.fetchone()[0]
+
+
+def prune_model_history(label: str, dry_run: bool = False) -> HistoryPruneReport:
+    """
+    Deletes the history of the model (e.g. "chat.User") that its HISTORY_RETENTION_POLICIES entry does not keep,
+    in batches of HISTORY_PRUNE_BATCH_SIZE rows so that each delete is a short transaction.
+    """
+    policy = _retention_policy(label)
+    history_model = apps.get_model(label).history.model
+    batch_size = settings.HISTORY_PRUNE_BATCH_SIZE
+    cutoff = None
+    if policy.get("max_age_days") is not None:
+        cutoff = timezone.now() - timezone.timedelta(days=policy["max_age_days"])
+
+    batches: list[Iterator[list[int]]] = []
+    if cutoff is not None:
+        batches.append(_expired_batches(history_model, cutoff, batch_size))
+    if policy.get("first_and_last"):
+        batches.append(_intermediate_version_batches(history_model, cutoff, batch_size))
+
+    report = HistoryPruneReport(model=label)
+    for batch_iterator in batches:
+        for batch in batch_iterator:
+            report.bytes += _rows_bytes(history_model, batch)
+            report.rows += len(batch)
+            if not dry_run:
+                history_model.objects.filter(history_id__in=batch).delete()
+    return report
+
+
+@shared_task
+def prune_history(dry_run: bool = False) -> list[dict]:
+    """Applies HISTORY_RETENTION_POLICIES to the history of each listed model, to be scheduled daily."""
+    reports = []
+    for label in settings.HISTORY_RETENTION_POLICIES:
+        report = prune_model_history(label, dry_run=dry_run)
+        logger.info(
+            f"{'Would prune' if dry_run else 'Pruned'} {report.rows} history rows ({report.bytes} bytes) of {label}"
+        )
+        reports.append(asdict(report))
+    return reports
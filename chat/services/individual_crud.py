@@ -1,7 +1,8 @@
-from django.utils import timezone
+from dataclasses import dataclass
 import re
 import logging
 
+from chat.history import bulk_history_create
 from chat.serializers import IndividualIncomingMessage
 
 from ..models import (
@@ -14,11 +15,14 @@ from ..models import (
     IndividualChatTranscript,
     IndividualPrompt,
     ControlConfig,
+    compute_content_hash,
 )
-from django.db import transaction
+from django.db import connection, models, transaction
 
 logger = logging.getLogger(__name__)
 
+_DEFAULT_TRANSCRIPT_LEN_CUTOFF = 25
+
 
 def _validate_and_truncate_name(name: str, participant_id: str = "") -> str:
     """
@@ -72,55 +76,223 @@ def format_chat_history(chat_history, delimiter="\n"):
     return delimiter.join(parts)
 
 
-def _create_user_and_get_or_create_session(participant_id: str, individual_incoming_message: IndividualIncomingMessage):
+def get_transcript_len_cutoff() -> int:
+    """
+    Returns the maximum number of transcripts to include in an LLM chat history.
+    """
+    raw_cutoff = (
+        ControlConfig.retrieve(ControlConfig.ControlConfigKey.TRANSCRIPT_LEN_CUTOFF) or _DEFAULT_TRANSCRIPT_LEN_CUTOFF
+    )
+    try:
+        return int(raw_cutoff)
+    except (TypeError, ValueError):
+        return _DEFAULT_TRANSCRIPT_LEN_CUTOFF
+
+
+_UPSERT_USER_AND_SESSION_SQL = """
+WITH upserted_user AS (
+    INSERT INTO {user_table} ({user_insert_columns}) VALUES ({user_insert_placeholders})
+    ON CONFLICT (id) DO UPDATE
+        SET school_name = EXCLUDED.school_name, school_mascot = EXCLUDED.school_mascot, name = EXCLUDED.name
+        WHERE ({user_table}.school_name, {user_table}.school_mascot, {user_table}.name)
+            IS DISTINCT FROM (EXCLUDED.school_name, EXCLUDED.school_mascot, EXCLUDED.name)
+    RETURNING {user_columns}, (xmax = 0) AS created
+),
+user_row AS (
+    SELECT {user_columns}, true AS written, created FROM upserted_user
+    UNION ALL
+    SELECT {user_columns}, false, false FROM {user_table}
+    WHERE id = %s AND NOT EXISTS (SELECT 1 FROM upserted_user)
+),
+inserted_session AS (
+    INSERT INTO {session_table} ({session_insert_columns}) VALUES ({session_insert_placeholders})
+    ON CONFLICT (user_id, week_number, message_type) DO NOTHING
+    RETURNING {session_columns}
+),
+session_row AS (
+    SELECT {session_columns}, true AS created FROM inserted_session
+    UNION ALL
+    SELECT {session_columns}, false FROM {session_table}
+    WHERE user_id = %s AND week_number = %s AND message_type = %s
+)
+SELECT
+    {user_row_columns}, u.written, u.created,
+    {session_row_columns}, s.created,
+    EXISTS (
+        SELECT 1 FROM {transcript_table} t JOIN {session_table} ts ON ts.id = t.session_id
+        WHERE ts.user_id = %s AND t.hub_initiated AND t.content_hash = %s AND t.content = %s
+    ),
+    (
+        SELECT t.content FROM {transcript_table} t
+        WHERE t.session_id = s.id AND t.hub_initiated ORDER BY t.created_at LIMIT 1
+    )
+FROM user_row u LEFT JOIN session_row s ON true
+"""
+
+
+@dataclass
+class _UpsertedUserAndSession:
+    user: User
+    user_written: bool
+    user_created: bool
+    session: IndividualSession
+    session_created: bool
+    initial_message_exists: bool
+    session_initial_message: str
+
+
+def _insert_columns_and_params(instance: models.Model) -> tuple[list[str], list]:
+    fields = [f for f in instance._meta.concrete_fields if not isinstance(f, models.AutoField)]
+    columns = [connection.ops.quote_name(f.column) for f in fields]
+    params = [f.get_db_prep_save(f.pre_save(instance, True), connection) for f in fields]
+    return columns, params
+
+
+def _upsert_user_and_session(
+    user: User, session: IndividualSession, initial_message: str | None
+) -> _UpsertedUserAndSession | None:
+    """
+    Creates the user (or updates it only if its attributes changed) and gets or creates the session, in a
+    single statement that also returns what is needed to decide whether to persist the initial message.
+
+    Returns None if a concurrent ingest for the same user created the user or session after this
+    statement's snapshot was taken, in which case the caller should retry.
+    """
+    user_fields = User._meta.concrete_fields
+    session_fields = IndividualSession._meta.concrete_fields
+    user_insert_columns, user_insert_params = _insert_columns_and_params(user)
+    session_insert_columns, session_insert_params = _insert_columns_and_params(session)
+    sql = _UPSERT_USER_AND_SESSION_SQL.format(
+        user_table=User._meta.db_table,
+        session_table=IndividualSession._meta.db_table,
+        transcript_table=IndividualChatTranscript._meta.db_table,
+        user_insert_columns=", ".join(user_insert_columns),
+        user_insert_placeholders=", ".join(["%s"] * len(user_insert_columns)),
+        session_insert_columns=", ".join(session_insert_columns),
+        session_insert_placeholders=", ".join(["%s"] * len(session_insert_columns)),
+        user_columns=", ".join(connection.ops.quote_name(f.column) for f in user_fields),
+        session_columns=", ".join(connection.ops.quote_name(f.column) for f in session_fields),
+        user_row_columns=", ".join(f"u.{connection.ops.quote_name(f.column)}" for f in user_fields),
+        session_row_columns=", ".join(f"s.{connection.ops.quote_name(f.column)}" for f in session_fields),
+    )
+    user_id = User._meta.pk.get_db_prep_value(user.id, connection)
+    params = [
+        *user_insert_params,
+        user_id,
+        *session_insert_params,
+        user_id,
+        session.week_number,
+        session.message_type,
+        user_id,
+        compute_content_hash(initial_message),
+        initial_message,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+
+    user_values, row = row[: len(user_fields)], row[len(user_fields) :]
+    user_written, user_created, row = row[0], row[1], row[2:]
+    session_values, row = row[: len(session_fields)], row[len(session_fields) :]
+    session_created, initial_message_exists, session_initial_message = row
+    if session_values[0] is None:
+        return None
+
+    upserted_user = User.from_db(connection.alias, [f.attname for f in user_fields], user_values)
+    upserted_session = IndividualSession.from_db(connection.alias, [f.attname for f in session_fields], session_values)
+    upserted_session.user = upserted_user
+    return _UpsertedUserAndSession(
+        user=upserted_user,
+        user_written=user_written,
+        user_created=user_created,
+        session=upserted_session,
+        session_created=session_created,
+        initial_message_exists=initial_message_exists,
+        session_initial_message=session_initial_message or "",
+    )
+
+
+def _create_user_and_get_or_create_session(
+    participant_id: str, individual_incoming_message: IndividualIncomingMessage
+) -> _UpsertedUserAndSession:
     # Validate and truncate user data
     validated_name = _validate_and_truncate_name(individual_incoming_message.context.name, participant_id)
-    
-    user, _ = User.objects.update_or_create(
+    user = User(
         id=participant_id,
-        defaults={
-            "created_at": timezone.now(),
-            "school_name": individual_incoming_message.context.school_name,
-            "school_mascot": individual_incoming_message.context.school_mascot,
-            "name": validated_name,
-        },
+        school_name=individual_incoming_message.context.school_name,
+        school_mascot=individual_incoming_message.context.school_mascot,
+        name=validated_name,
     )
-    session, created_session = IndividualSession.objects.get_or_create(
+    session = IndividualSession(
         user=user,
         week_number=individual_incoming_message.context.week_number,
         message_type=individual_incoming_message.context.message_type,
     )
-    return user, session, created_session
+    initial_message = individual_incoming_message.context.initial_message or None
+
+    upserted = _upsert_user_and_session(user, session, initial_message)
+    if upserted is None:
+        # another ingest for this participant created the user or session concurrently, which is now visible
+        upserted = _upsert_user_and_session(user, session, initial_message)
+    if upserted is None:
+        raise RuntimeError(f"Could not create or load user and session for participant {participant_id}")
+
+    # the upsert bypasses model signals, so record history only for the rows it actually wrote
+    if upserted.user_written:
+        bulk_history_create(User, [upserted.user], update=not upserted.user_created)
+    if upserted.session_created:
+        bulk_history_create(IndividualSession, [upserted.session])
+    return upserted
 
 
 def ingest_request(participant_id: str, individual_incoming_message: IndividualIncomingMessage):
     """
     Ingests an individual request by either creating a new user record or updating
     an existing one. The operation is wrapped in an atomic transaction for consistency.
+
+    Users are only written when their attributes change, and the user message (with the initial
+    message, if it needs persisting) is inserted in one statement.
     """
     logger.info("Processing request for participant ID: %s", participant_id)
 
     with transaction.atomic():
-        user, session, created_session = _create_user_and_get_or_create_session(
-            participant_id, individual_incoming_message
-        )
-        IndividualChatTranscript.persist_initial_message_if_necessary(
-            user,
-            individual_incoming_message.context.initial_message,
-            session,
-            created_session,
-        )
+        upserted = _create_user_and_get_or_create_session(participant_id, individual_incoming_message)
+        user, session = upserted.user, upserted.session
+        initial_message = individual_incoming_message.context.initial_message
+        transcripts = []
+        persist_initial_message = bool(initial_message) and not upserted.initial_message_exists
+        if persist_initial_message and not upserted.session_created:
+            persist_initial_message = not IndividualChatTranscript.initial_message_conflicts_with_session(
+                initial_message, session, upserted.session_initial_message
+            )
+        if persist_initial_message:
+            # either the session is new for a new initial message
+            # or the initial message was sent after the session was created
+            transcripts.append(
+                IndividualChatTranscript(
+                    session=session,
+                    role=BaseChatTranscript.Role.ASSISTANT,
+                    content=initial_message,
+                    hub_initiated=True,
+                )
+            )
         # in either case, we need to add the user message to the transcript
-        user_chat_transcript = IndividualChatTranscript.objects.create(
+        user_chat_transcript = IndividualChatTranscript(
             session=session, role=BaseChatTranscript.Role.USER, content=individual_incoming_message.message
         )
+        transcripts.append(user_chat_transcript)
+        IndividualChatTranscript.objects.bulk_create(transcripts)
+        bulk_history_create(IndividualChatTranscript, transcripts)
 
     return user, session, user_chat_transcript
 
 
 def ingest_initial_message(participant_id: str, individual_incoming_message: IndividualIncomingMessage):
     with transaction.atomic():
-        user, session, _ = _create_user_and_get_or_create_session(participant_id, individual_incoming_message)
+        upserted = _create_user_and_get_or_create_session(participant_id, individual_incoming_message)
+        user, session = upserted.user, upserted.session
         assistant_chat_transcript = IndividualChatTranscript.objects.create(
             session=session,
             role=BaseChatTranscript.Role.ASSISTANT,
@@ -202,11 +374,7 @@ def load_individual_and_group_chat_history_for_direct_messaging(user: User):
         if latest_user_transcript
         else ""
     )
-    raw_cutoff = ControlConfig.retrieve(ControlConfig.ControlConfigKey.TRANSCRIPT_LEN_CUTOFF) or 25
-    try:
-        cutoff = int(raw_cutoff)
-    except (TypeError, ValueError):
-        cutoff = 25
+    cutoff = get_transcript_len_cutoff()
     history = history[-cutoff:]
     return history, latest_user_message_content
 
@@ -256,11 +424,7 @@ def load_individual_chat_history(user: User):
         if latest_user_transcript
         else ""
     )
-    raw_cutoff = ControlConfig.retrieve(ControlConfig.ControlConfigKey.TRANSCRIPT_LEN_CUTOFF) or 25
-    try:
-        cutoff = int(raw_cutoff)
-    except (TypeError, ValueError):
-        cutoff = 25
+    cutoff = get_transcript_len_cutoff()
     history = history[-cutoff:]
     return history, latest_user_message_content
 
@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from ..models import GroupPrompt, GroupStrategyPhaseConfig
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class LookupCache:
+    """
+    An in-process snapshot of a small, rarely changing table, shared by all threads in the process.
+
+    Writes bump a version counter in redis (see invalidate), which every process checks at most once per
+    LOOKUP_CACHE_VERSION_CHECK_SECONDS before serving its snapshot. If redis is unavailable the snapshot is
+    not kept and every lookup reads the database, as it did before caching.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], dict]):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._snapshot: dict | None = None
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None) -> Any:
+        return self._current_snapshot().get(key, default)
+
+    def clear(self):
+        """Drops this process's snapshot, so the next lookup reloads it."""
+        with self._lock:
+            self._snapshot = None
+            self._version = None
+
+    def invalidate(self):
+        """
+        Drops the snapshot in this process immediately, and in every other process once the current
+        transaction commits (so that they cannot reload the snapshot before the write is visible).
+        """
+        self.clear()
+        transaction.on_commit(self._bump_shared_version)
+
+    def _version_key(self) -> str:
+        return f"lookup-cache:{self.name}:version"
+
+    def _shared_version(self) -> int | None:
+        try:
+            return int(get_redis_client().get(self._version_key()) or 0)
+        except redis.RedisError:
+            logger.warning(f"Could not read version of lookup cache '{self.name}', reading from the database.")
+            return None
+
+    def _bump_shared_version(self):
+        self.clear()
+        try:
+            get_redis_client().incr(self._version_key())
+        except redis.RedisError:
+            logger.exception(f"Failed to invalidate lookup cache '{self.name}' in other processes")
+
+    def _current_snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is not None and now - self._checked_at < settings.LOOKUP_CACHE_VERSION_CHECK_SECONDS:
+                self.hits += 1
+                return self._snapshot
+            version = self._shared_version()
+            if self._snapshot is not None and version is not None and version == self._version:
+                self._checked_at = now
+                self.hits += 1
+                return self._snapshot
+
+            self.misses += 1
+            snapshot = self._loader()
+            if version is not None:
+                self._snapshot, self._version, self._checked_at = snapshot, version, now
+            logger.info(f"Loaded lookup cache '{self.name}' ({len(snapshot)} rows), stats: {self.stats()}")
+            return snapshot
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def _load_group_strategy_phase_configs() -> dict:
+    return {config.group_strategy_phase: config for config in GroupStrategyPhaseConfig.objects.all()}
+
+
+def _load_group_prompt_activities() -> dict:
+    return {
+        (prompt["week"], prompt["message_type"], prompt["strategy_type"]): prompt["activity"]
+        for prompt in GroupPrompt.objects.values("week", "message_type", "strategy_type", "activity")
+    }
+
+
+group_strategy_phase_configs = LookupCache("group_strategy_phase_configs", _load_group_strategy_phase_configs)
+group_prompt_activities = LookupCache("group_prompt_activities", _load_group_prompt_activities)
+
+_LOOKUP_CACHES = [group_strategy_phase_configs, group_prompt_activities]
+
+
+def clear_lookup_caches():
+    for cache in _LOOKUP_CACHES:
+        cache.clear()
+
+
+def lookup_cache_stats() -> dict[str, dict]:
+    return {cache.name: cache.stats() for cache in _LOOKUP_CACHES}
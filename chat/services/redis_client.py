@@ -0,0 +1,16 @@
+import redis
+from django.conf import settings
+
+_client: redis.Redis | None = None
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Returns a process-wide Redis client used for coordination state (leases, counters).
+
+    The client is created lazily and shared, as redis-py clients are thread-safe and pool connections.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=5, socket_timeout=5)
+    return _client
@@ -16,6 +16,7 @@ from chat.models import (
     SundaySummaryPrompt,
     User,
 )
+from chat.routers import read_from_replica
 from chat.services.send import send_missing_summary_notification, send_school_summaries_to_hub_for_week
 from chat.services.completion import generate_response
 
@@ -155,6 +156,7 @@ def _persist_summaries(school_name: str, week_number: int, summaries: list[str])
 
 
 @shared_task
+@read_from_replica()
 def generate_weekly_summaries():
     """
     Generate weekly summaries for all schools.
@@ -198,6 +200,7 @@ def handle_summaries_selected_change(changed_summary_ids: list[str]):
 
 
 @shared_task
+@read_from_replica()
 def notify_on_missing_summaries():
     """
     Notify admins if there are missing summaries for any schools, to be scheduled weekly.
@@ -0,0 +1,32 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from django_celery_results.models import TaskResult
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def prune_task_results() -> int:
+    """
+    Deletes stored celery task results older than TASK_RESULT_RETENTION_DAYS, to be scheduled daily.
+
+    Rows are deleted in batches of TASK_RESULT_PRUNE_BATCH_SIZE so that each delete is a short transaction,
+    rather than one long delete locking a large table while workers are writing results to it.
+    """
+    cutoff = timezone.now() - timezone.timedelta(days=settings.TASK_RESULT_RETENTION_DAYS)
+    total_deleted = 0
+    while True:
+        batch_ids = list(
+            TaskResult.objects.filter(date_done__lt=cutoff)
+            .order_by("date_done")
+            .values_list("id", flat=True)[: settings.TASK_RESULT_PRUNE_BATCH_SIZE]
+        )
+        if not batch_ids:
+            break
+        deleted, _ = TaskResult.objects.filter(id__in=batch_ids).delete()
+        total_deleted += deleted
+    logger.info(f"Pruned {total_deleted} task results completed before {cutoff.isoformat()}")
+    return total_deleted
@@ -1,9 +1,13 @@
 from typing import Callable
-from django.db.models.signals import post_delete, ModelSignal
+from celery.signals import task_postrun
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save, ModelSignal
 from django.apps import apps
 from django.db import models
 
-from chat.models import ScheduledTaskAssociation
+from chat.history import flush_history
+from chat.models import GroupPrompt, GroupStrategyPhaseConfig, ScheduledTaskAssociation
+from chat.services.lookup_cache import group_prompt_activities, group_strategy_phase_configs
 
 
 def connect_signal_to_child_models(abstract_model: models.Model, signal: ModelSignal, receiver_function: Callable):
@@ -19,3 +23,23 @@ def on_delete_scheduled_task_associations(sender, instance: ScheduledTaskAssocia
 
 
 connect_signal_to_child_models(ScheduledTaskAssociation, post_delete, on_delete_scheduled_task_associations)
+
+
+def on_change_group_strategy_phase_config(sender, instance: GroupStrategyPhaseConfig, **kwargs):
+    """Invalidate cached strategy phase configs when one is written"""
+    group_strategy_phase_configs.invalidate()
+
+
+def on_change_group_prompt(sender, instance: GroupPrompt, **kwargs):
+    """Invalidate cached group prompts when one is written"""
+    group_prompt_activities.invalidate()
+
+
+for signal in (post_save, post_delete):
+    signal.connect(on_change_group_strategy_phase_config, sender=GroupStrategyPhaseConfig)
+    signal.connect(on_change_group_prompt, sender=GroupPrompt)
+
+
+# write the history rows buffered during the request or task (see HISTORY_BATCHED_WRITES)
+request_finished.connect(flush_history, dispatch_uid="flush_history_request")
+task_postrun.connect(flush_history, dispatch_uid="flush_history_task", weak=False)
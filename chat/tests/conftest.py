@@ -6,6 +6,8 @@ import pytest
 import factory
 from pytest_factoryboy import register
 
+from chat.services import lookup_cache
+
 from chat.models import (
     BaseChatTranscript,
     ControlConfig,
@@ -41,6 +43,12 @@ def enable_db_access(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_lookup_caches():
+    # rows cached by a previous test are rolled back without firing the signals that invalidate the caches
+    lookup_cache.clear_lookup_caches()
+
+
 @pytest.fixture(autouse=True)
 def overwrite_secrets():
     # overwrite secrets to prevent hitting real services while unit testing, just in case
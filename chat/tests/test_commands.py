@@ -1,4 +1,5 @@
 import os
+from io import StringIO
 from unittest.mock import patch
 from django.core.management import call_command, CommandError
 import pytest
@@ -35,3 +36,21 @@ def test_clear_all_prompts_user_does_not_confirm(individual_prompt_factory, cont
     assert IndividualPrompt.objects.count() == 2
     assert ControlConfig.objects.count() == 1
     assert "Operation cancelled" in str(e)
+
+
+def test_explain_hot_queries_uses_indexes(group_with_initial_message_interaction, individual_chat_transcript_factory):
+    individual_chat_transcript_factory.create_batch(3)
+    out = StringIO()
+
+    call_command("explain_hot_queries", "--disable-seqscan", "--fail-on-seq-scan", stdout=out)
+
+    output = out.getvalue()
+    assert "SEQ SCAN" not in output
+    for index in [
+        "chat_ind_session_user_created",
+        "chat_grp_session_group_created",
+        "chat_grp_record_group_created",
+        "chat_grp_transcript_history",
+        "chat_ind_transcript_hub_hash",
+    ]:
+        assert index in output
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from chat.models import (
+    BaseChatTranscript,
+    ContentBlob,
+    IndividualChatTranscript,
+    IndividualPipelineRecord,
+    compute_content_hash,
+)
+
+
+def test_repeated_prompts_are_stored_once(individual_pipeline_record_factory, individual_chat_transcript_factory):
+    records = individual_pipeline_record_factory.create_batch(3, instruction_prompt="Shared prompt")
+    records[0].chat_history = "Some history"
+    records[0].save()
+    transcript = individual_chat_transcript_factory(instruction_prompt="Shared prompt", chat_history="Some history")
+
+    assert ContentBlob.objects.count() == 2
+    for record in records:
+        record = IndividualPipelineRecord.objects.get(id=record.id)
+        assert record.instruction_prompt == "Shared prompt"
+        assert record.instruction_prompt_blob_id == compute_content_hash("Shared prompt")
+        assert record.instruction_prompt_inline is None
+    # history rows reference the blob instead of copying the text
+    historical = transcript.history.first()
+    assert historical.instruction_prompt_blob_id == compute_content_hash("Shared prompt")
+    assert historical.chat_history_blob_id == compute_content_hash("Some history")
+    assert historical.instruction_prompt_inline is None
+
+
+def test_prompts_stored_through_bulk_create(individual_session_factory):
+    session = individual_session_factory()
+    IndividualChatTranscript.objects.bulk_create(
+        [
+            IndividualChatTranscript(
+                session=session, role=BaseChatTranscript.Role.ASSISTANT, content="Hi", instruction_prompt="Prompt"
+            )
+            for _ in range(2)
+        ]
+    )
+
+    assert list(ContentBlob.objects.values_list("content", flat=True)) == ["Prompt"]
+    assert [t.instruction_prompt for t in session.transcripts.all()] == ["Prompt", "Prompt"]
+
+
+def test_clearing_prompt(individual_pipeline_record_factory):
+    record = individual_pipeline_record_factory(instruction_prompt="Prompt")
+    record.instruction_prompt = None
+    record.save()
+
+    record.refresh_from_db()
+    assert record.instruction_prompt is None
+    assert record.instruction_prompt_blob_id is None
+
+
+def test_compact_content_blobs(individual_pipeline_record_factory, individual_chat_transcript_factory):
+    # rows written before content blobs existed
+    record = individual_pipeline_record_factory(instruction_prompt=None)
+    IndividualPipelineRecord.objects.filter(id=record.id).update(
+        instruction_prompt_inline="Old prompt", chat_history_inline="Old history"
+    )
+    transcript = individual_chat_transcript_factory()
+    IndividualChatTranscript.objects.filter(id=transcript.id).update(instruction_prompt_inline="Old prompt")
+    # a row whose prompt was replaced by a blob after it was written inline
+    newer = individual_pipeline_record_factory(instruction_prompt="New prompt")
+    IndividualPipelineRecord.objects.filter(id=newer.id).update(instruction_prompt_inline="Stale prompt")
+
+    record.refresh_from_db()
+    assert record.instruction_prompt == "Old prompt"
+
+    out = StringIO()
+    call_command("compact_content_blobs", "--batch-size", "1", stdout=out)
+
+    record.refresh_from_db()
+    transcript.refresh_from_db()
+    newer.refresh_from_db()
+    assert (record.instruction_prompt, record.chat_history) == ("Old prompt", "Old history")
+    assert record.instruction_prompt_inline is None and record.chat_history_inline is None
+    assert transcript.instruction_prompt == "Old prompt"
+    assert transcript.instruction_prompt_inline is None
+    assert newer.instruction_prompt == "New prompt"
+    assert newer.instruction_prompt_inline is None
+    assert set(ContentBlob.objects.values_list("content", flat=True)) == {"Old prompt", "Old history", "New prompt"}
+    assert "chat_individualpipelinerecord: compacted 2 rows" in out.getvalue()
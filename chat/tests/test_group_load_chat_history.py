@@ -1,5 +1,5 @@
 from django.utils import timezone
-from chat.models import BaseChatTranscript, GroupStrategyPhase, MessageType
+from chat.models import BaseChatTranscript, ControlConfig, GroupStrategyPhase, MessageType
 from chat.services.group_crud import load_group_chat_history
 
 
@@ -175,3 +175,71 @@ def test_history_with_moderation_flagged(
     assert history[1]["name"] == "Alce-1"
     assert history[2]["name"] == "Eagle"
     assert latest == f"[Sender/User Name: {latest_transcript.sender.name}]: " + "Final"
+
+
+def test_history_limited_to_transcript_len_cutoff(
+    group_factory, user_factory, group_session_factory, group_chat_transcript_factory, control_config_factory
+):
+    control_config_factory(key=ControlConfig.ControlConfigKey.TRANSCRIPT_LEN_CUTOFF, value="3")
+    group = group_factory()
+    u1 = user_factory(id="u1", name="Max", group=group, school_mascot="Eagle")
+    session = group_session_factory(group=group, week_number=1, message_type=MessageType.INITIAL)
+    now = timezone.now()
+    for i in range(6):
+        group_chat_transcript_factory(
+            session=session,
+            role=BaseChatTranscript.Role.USER if i % 2 else BaseChatTranscript.Role.ASSISTANT,
+            content=f"message {i}",
+            sender=u1 if i % 2 else None,
+            created_at=now + timezone.timedelta(seconds=i),
+        )
+
+    history, latest = load_group_chat_history(session)
+
+    # the latest user message (5) is returned separately, and the history holds the 3 messages before it
+    assert [h["content"].split("]: ")[-1] for h in history] == ["message 2", "message 3", "message 4"]
+    assert latest == "[Sender/User Name: Max]: message 5"
+
+
+def test_latest_user_message_older_than_window(
+    group_factory, user_factory, group_session_factory, group_chat_transcript_factory, control_config_factory
+):
+    control_config_factory(key=ControlConfig.ControlConfigKey.TRANSCRIPT_LEN_CUTOFF, value="2")
+    group = group_factory()
+    u1 = user_factory(id="u1", name="Max", group=group, school_mascot="Eagle")
+    session = group_session_factory(group=group, week_number=1, message_type=MessageType.INITIAL)
+    now = timezone.now()
+    group_chat_transcript_factory(
+        session=session, role=BaseChatTranscript.Role.USER, content="Hi", sender=u1, created_at=now
+    )
+    for i in range(3):
+        group_chat_transcript_factory(
+            session=session,
+            role=BaseChatTranscript.Role.ASSISTANT,
+            content=f"reply {i}",
+            created_at=now + timezone.timedelta(seconds=i + 1),
+        )
+
+    history, latest = load_group_chat_history(session)
+
+    assert [h["content"].split("]: ")[-1] for h in history] == ["reply 1", "reply 2"]
+    assert all(h["name"] == "Eagle" for h in history)
+    assert latest == "[Sender/User Name: Max]: Hi"
+
+
+def test_history_loaded_in_single_query(
+    group_factory, user_factory, group_session_factory, group_chat_transcript_factory, django_assert_num_queries
+):
+    group = group_factory()
+    users = [user_factory(id=f"u{i}", name=f"User {i}", group=group, school_mascot="Eagle") for i in range(3)]
+    session = group_session_factory(group=group, week_number=1, message_type=MessageType.INITIAL)
+    for i in range(10):
+        group_chat_transcript_factory(
+            session=session, role=BaseChatTranscript.Role.USER, content=f"message {i}", sender=users[i % 3]
+        )
+
+    # one query for the transcript len cutoff config, one for the transcripts and their senders
+    with django_assert_num_queries(2):
+        history, latest = load_group_chat_history(session)
+    assert len(history) == 9
+    assert latest.endswith("message 9")
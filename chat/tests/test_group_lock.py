@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock, patch
+import pytest
+import redis
+
+from chat.models import Group, GroupScheduledTaskAssociation
+from chat.services.group_lock import GroupLease, StaleGroupLeaseError, check_fencing_token, group_lease
+from chat.services.group_pipeline import _clear_existing_and_schedule_group_action
+
+
+@pytest.fixture
+def mock_redis_client():
+    client = MagicMock()
+    client.set.return_value = True
+    client.incr.return_value = 5
+    client.eval.return_value = 1
+    with patch("chat.services.group_lock.get_redis_client", return_value=client):
+        yield client
+
+
+def test_group_lease_disabled(settings, mock_redis_client):
+    settings.GROUP_INGEST_LOCK_ENABLED = False
+    with group_lease("some-group") as lease:
+        assert lease is None
+    mock_redis_client.set.assert_not_called()
+
+
+def test_group_lease_acquire_and_release(settings, mock_redis_client):
+    settings.GROUP_INGEST_LOCK_ENABLED = True
+    with group_lease("some-group") as lease:
+        assert lease.group_id == "some-group"
+        assert lease.fencing_token == 5
+        set_args, set_kwargs = mock_redis_client.set.call_args
+        assert set_args == ("group-lease:some-group", lease.owner)
+        assert set_kwargs == {"nx": True, "px": settings.GROUP_INGEST_LOCK_TTL_SECONDS * 1000}
+        mock_redis_client.eval.assert_not_called()
+    mock_redis_client.eval.assert_called_once()
+    assert mock_redis_client.eval.call_args.args[1:] == (1, "group-lease:some-group", lease.owner)
+
+
+def test_group_lease_released_on_error(settings, mock_redis_client):
+    settings.GROUP_INGEST_LOCK_ENABLED = True
+    with pytest.raises(ValueError):
+        with group_lease("some-group"):
+            raise ValueError("boom")
+    mock_redis_client.eval.assert_called_once()
+
+
+def test_group_lease_fencing_token_seeded_from_db(settings, mock_redis_client, group_factory):
+    settings.GROUP_INGEST_LOCK_ENABLED = True
+    group = group_factory(lease_fencing_token=41)
+    mock_redis_client.incr.return_value = 1
+    mock_redis_client.incrby.return_value = 42
+    with group_lease(group.id) as lease:
+        assert lease.fencing_token == 42
+    mock_redis_client.incrby.assert_called_once_with(f"group-lease:{group.id}:fence", 41)
+
+
+def test_group_lease_wait_timeout_fails_open(settings, mock_redis_client, caplog):
+    settings.GROUP_INGEST_LOCK_ENABLED = True
+    settings.GROUP_INGEST_LOCK_WAIT_SECONDS = 0
+    mock_redis_client.set.return_value = None
+    with group_lease("some-group") as lease:
+        assert lease is None
+    mock_redis_client.eval.assert_not_called()
+    assert "Proceeding without it" in caplog.text
+
+
+def test_group_lease_redis_unavailable_fails_open(settings, mock_redis_client):
+    settings.GROUP_INGEST_LOCK_ENABLED = True
+    mock_redis_client.set.side_effect = redis.ConnectionError("down")
+    with group_lease("some-group") as lease:
+        assert lease is None
+
+
+def test_check_fencing_token(group_factory):
+    group = group_factory()
+    check_fencing_token(GroupLease(group_id=group.id, owner="a", fencing_token=3))
+    # the same lease can write repeatedly
+    check_fencing_token(GroupLease(group_id=group.id, owner="a", fencing_token=3))
+    group.refresh_from_db()
+    assert group.lease_fencing_token == 3
+
+    with pytest.raises(StaleGroupLeaseError):
+        check_fencing_token(GroupLease(group_id=group.id, owner="b", fencing_token=2))
+    group.refresh_from_db()
+    assert group.lease_fencing_token == 3
+
+
+def test_stale_lease_does_not_reschedule(group_with_initial_message_interaction):
+    group, session, record, _ = group_with_initial_message_interaction
+    transcript = session.transcripts.order_by("-created_at").first()
+    Group.objects.filter(id=group.id).update(lease_fencing_token=10)
+
+    with pytest.raises(StaleGroupLeaseError):
+        _clear_existing_and_schedule_group_action(
+            transcript, record, GroupLease(group_id=group.id, owner="a", fencing_token=9)
+        )
+    assert not GroupScheduledTaskAssociation.objects.filter(group=group).exists()
+
+    _clear_existing_and_schedule_group_action(
+        transcript, record, GroupLease(group_id=group.id, owner="b", fencing_token=11)
+    )
+    assert GroupScheduledTaskAssociation.objects.filter(group=group).count() == 1
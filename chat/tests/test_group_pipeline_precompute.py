@@ -0,0 +1,132 @@
+from unittest.mock import patch
+import pytest
+
+from chat.models import BaseChatTranscript, GroupPipelineRecord, GroupStrategyPhase
+from chat.services.group_pipeline import (
+    _clear_existing_and_schedule_group_action,
+    precompute_group_action,
+    take_action_on_group,
+)
+
+
+@pytest.fixture
+def _mocks():
+    with (
+        patch(
+            "chat.services.group_pipeline.send_message_to_participant_group", return_value={"status": "ok"}
+        ) as mock_send_message_to_participant,
+        patch(
+            "chat.services.completion._generate_response", return_value=("Precomputed response", None, None)
+        ) as mock_generate_response,
+    ):
+        yield mock_send_message_to_participant, mock_generate_response
+
+
+@pytest.fixture
+def scheduled_group(group_with_initial_message_interaction, control_prompts):
+    group, session, record, _ = group_with_initial_message_interaction
+    record.status = GroupPipelineRecord.StageStatus.SCHEDULED_ACTION
+    record.save()
+    trigger = session.transcripts.order_by("-created_at").first()
+    return group, session, record, trigger
+
+
+def test_precomputed_response_used_when_no_newer_transcripts(_mocks, scheduled_group):
+    mock_send, mock_generate_response = _mocks
+    group, session, record, trigger = scheduled_group
+
+    precompute_group_action(str(record.run_id), trigger.id)
+
+    record.refresh_from_db()
+    assert record.status == GroupPipelineRecord.StageStatus.SCHEDULED_ACTION
+    assert record.validated_message == "Precomputed response"
+    assert record.precomputed_strategy_phase == GroupStrategyPhase.AUDIENCE
+    assert record.precomputed_high_water_mark == session.transcripts.order_by("-id").first().id
+    assert mock_generate_response.call_count == 1
+    assert mock_send.call_count == 0
+
+    take_action_on_group(record.run_id, trigger.id)
+
+    assert mock_generate_response.call_count == 1
+    mock_send.assert_called_once_with(group.id, "Precomputed response")
+    session.refresh_from_db()
+    assert session.current_strategy_phase == GroupStrategyPhase.AFTER_AUDIENCE
+
+
+def test_precomputed_response_discarded_after_newer_transcript(_mocks, scheduled_group, group_chat_transcript_factory):
+    mock_send, mock_generate_response = _mocks
+    group, session, record, trigger = scheduled_group
+
+    precompute_group_action(str(record.run_id), trigger.id)
+    # e.g. a hub initiated message arrives during the wait window
+    group_chat_transcript_factory(
+        session=session, role=BaseChatTranscript.Role.ASSISTANT, content="Newer message", hub_initiated=True
+    )
+    mock_generate_response.return_value = ("Fresh response", None, None)
+
+    take_action_on_group(record.run_id, trigger.id)
+
+    assert mock_generate_response.call_count == 2
+    mock_send.assert_called_once_with(group.id, "Fresh response")
+
+
+def test_precomputed_response_discarded_for_other_phase(_mocks, scheduled_group, group_prompt_factory):
+    mock_send, mock_generate_response = _mocks
+    group, session, record, trigger = scheduled_group
+    group_prompt_factory(week=1, activity="<<INSTRUCTION FOR FOLLOWUP>>", strategy_type=GroupStrategyPhase.FOLLOWUP)
+
+    precompute_group_action(str(record.run_id), trigger.id)
+    session.current_strategy_phase = GroupStrategyPhase.AFTER_REMINDER
+    session.save()
+
+    take_action_on_group(record.run_id, trigger.id)
+
+    assert mock_generate_response.call_count == 2
+    record.refresh_from_db()
+    assert record.transcript.assistant_strategy_phase == GroupStrategyPhase.FOLLOWUP
+
+
+def test_precompute_skipped_when_newer_record_exists(_mocks, scheduled_group, group_pipeline_record_factory):
+    _, mock_generate_response = _mocks
+    group, session, record, trigger = scheduled_group
+    group_pipeline_record_factory(group=group, user=record.user, status=GroupPipelineRecord.StageStatus.INGEST_PASSED)
+
+    precompute_group_action(str(record.run_id), trigger.id)
+
+    record.refresh_from_db()
+    assert mock_generate_response.call_count == 0
+    assert record.precomputed_strategy_phase is None
+    # unlike the scheduled action, the precompute does not mark the record as skipped
+    assert record.status == GroupPipelineRecord.StageStatus.SCHEDULED_ACTION
+
+
+def test_precompute_failure_leaves_record_untouched(_mocks, scheduled_group, caplog):
+    _, mock_generate_response = _mocks
+    group, session, record, trigger = scheduled_group
+    mock_generate_response.side_effect = Exception("LLM down")
+
+    precompute_group_action(str(record.run_id), trigger.id)
+
+    record.refresh_from_db()
+    assert record.status == GroupPipelineRecord.StageStatus.SCHEDULED_ACTION
+    assert record.precomputed_strategy_phase is None
+    assert "Precomputing group action failed" in caplog.text
+
+
+@pytest.mark.parametrize("precompute_enabled", [True, False])
+def test_schedule_enqueues_precompute(
+    settings, scheduled_group, django_capture_on_commit_callbacks, precompute_enabled
+):
+    settings.GROUP_PRECOMPUTE_ENABLED = precompute_enabled
+    group, session, record, trigger = scheduled_group
+
+    with patch("chat.services.group_pipeline.precompute_group_action.apply_async") as mock_apply_async:
+        with django_capture_on_commit_callbacks(execute=True):
+            _clear_existing_and_schedule_group_action(trigger, record)
+
+    if precompute_enabled:
+        mock_apply_async.assert_called_once_with(
+            kwargs={"run_id": str(record.run_id), "user_chat_transcript_id": trigger.id}, priority=1
+        )
+    else:
+        mock_apply_async.assert_not_called()
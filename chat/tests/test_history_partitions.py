@@ -0,0 +1,66 @@
+import gzip
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from chat.models import IndividualChatTranscript
+from chat.services.history_partitions import create_history_partitions, list_history_partitions, month_start
+
+_TABLE = IndividualChatTranscript.history.model._meta.db_table
+
+
+def test_history_written_to_partitioned_table(individual_chat_transcript_factory):
+    transcript = individual_chat_transcript_factory(content="Hello")
+    transcript.content = "Hello again"
+    transcript.save()
+
+    assert [h.content for h in transcript.history.all()] == ["Hello again", "Hello"]
+    partitions = list_history_partitions(_TABLE)
+    assert partitions[0].name == f"{_TABLE}_legacy"
+    assert partitions[-1].is_default
+
+
+def test_create_history_partitions():
+    covered_until = max(p.upper for p in list_history_partitions(_TABLE) if not p.is_default)
+    months_ahead = 0
+    while month_start(timezone.now(), months_ahead) < covered_until:
+        months_ahead += 1
+
+    created = create_history_partitions(months_ahead + 1)
+
+    assert f"{_TABLE}_p{month_start(timezone.now(), months_ahead):%Y%m}" in created
+    assert f"{_TABLE}_p{month_start(timezone.now(), months_ahead + 1):%Y%m}" in created
+    assert len(created) == 8
+    # already covered
+    assert create_history_partitions(months_ahead + 1) == []
+
+
+def test_archive_history_partitions(individual_chat_transcript_factory, tmp_path):
+    transcript = individual_chat_transcript_factory(content="Archived")
+    next_month = month_start(timezone.now(), 1)
+    # moves the history row to the partition of next month
+    transcript.history.update(history_date=next_month + timedelta(days=1))
+    partitions = list_history_partitions(_TABLE)
+    # the test transaction still has deferred foreign key checks pending, which would block the drop
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+    out = StringIO()
+    with patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(days=365 * 2)):
+        call_command("archive_history_partitions", "--older-than-months", "12", "--dry-run", stdout=out)
+    assert f"Would archive {_TABLE}_p{next_month:%Y%m}" in out.getvalue()
+    assert list_history_partitions(_TABLE) == partitions
+
+    with patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(days=365 * 2)):
+        call_command("archive_history_partitions", "--older-than-months", "12", "--output-dir", tmp_path, stdout=out)
+
+    assert transcript.history.count() == 0
+    assert [p.name for p in list_history_partitions(_TABLE)] == [f"{_TABLE}_default"]
+    with gzip.open(tmp_path / f"{_TABLE}_p{next_month:%Y%m}.csv.gz", "rt") as archive:
+        lines = archive.read().splitlines()
+    assert lines[0].startswith("id,") and len(lines) == 2
+    assert "Archived" in lines[1]
@@ -0,0 +1,97 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.urls import reverse
+
+from chat.history import bulk_history_create, flush_history
+from chat.models import IndividualChatTranscript, IndividualPipelineRecord
+
+
+def test_pipeline_records_only_record_creation_by_default(individual_pipeline_record_factory):
+    record = individual_pipeline_record_factory()
+    record.status = IndividualPipelineRecord.StageStatus.PROCESS_PASSED
+    record.save()
+    record_id = record.id
+    record.delete()
+
+    assert [h.history_type for h in IndividualPipelineRecord.history.filter(id=record_id)] == ["+"]
+
+
+@pytest.mark.parametrize("policy, expected_history_types", [("full", ["~", "+"]), ("create", ["+"]), ("off", [])])
+def test_history_policy(settings, individual_chat_transcript_factory, policy, expected_history_types):
+    settings.HISTORY_POLICIES = {"chat.IndividualChatTranscript": policy}
+    transcript = individual_chat_transcript_factory()
+    transcript.moderation_status = IndividualChatTranscript.ModerationStatus.NOT_FLAGGED
+    transcript.save()
+
+    assert [h.history_type for h in transcript.history.all()] == expected_history_types
+
+
+def test_bulk_history_create_follows_policy(settings, individual_chat_transcript_factory):
+    settings.HISTORY_POLICIES = {"chat.IndividualChatTranscript": "create"}
+    transcript = individual_chat_transcript_factory()
+
+    bulk_history_create(IndividualChatTranscript, [transcript], update=True)
+    assert transcript.history.count() == 1
+    bulk_history_create(IndividualChatTranscript, [transcript])
+    assert transcript.history.count() == 2
+
+
+def test_unknown_history_policy(settings, individual_chat_transcript_factory):
+    settings.HISTORY_POLICIES = {"chat.IndividualChatTranscript": "sometimes"}
+
+    with pytest.raises(ImproperlyConfigured):
+        individual_chat_transcript_factory()
+
+
+def test_batched_history_written_on_flush(
+    settings, individual_session_factory, django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    settings.HISTORY_BATCHED_WRITES = True
+    session = individual_session_factory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            transcripts = [IndividualChatTranscript.objects.create(session=session, content=f"{i}") for i in range(3)]
+            transcripts[0].content = "edited"
+            transcripts[0].save()
+    assert IndividualChatTranscript.history.filter(session_id=session.id).count() == 0
+
+    with django_assert_num_queries(1):
+        flush_history()
+
+    assert [h.content for h in transcripts[0].history.all()] == ["edited", "0"]
+    assert IndividualChatTranscript.history.filter(session_id=session.id).count() == 4
+
+
+def test_batched_history_dropped_on_rollback(settings, individual_session_factory, django_capture_on_commit_callbacks):
+    settings.HISTORY_BATCHED_WRITES = True
+    session = individual_session_factory()
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        try:
+            with transaction.atomic():
+                IndividualChatTranscript.objects.create(session=session, content="rolled back")
+                raise ValueError()
+        except ValueError:
+            pass
+    flush_history()
+
+    assert callbacks == []
+    assert IndividualChatTranscript.history.filter(session_id=session.id).count() == 0
+
+
+def test_batched_history_flushed_at_end_of_request(
+    settings, admin_client, individual_chat_transcript_factory, django_capture_on_commit_callbacks
+):
+    settings.HISTORY_BATCHED_WRITES = True
+    with django_capture_on_commit_callbacks(execute=True):
+        transcript = individual_chat_transcript_factory()
+    assert transcript.history.count() == 0
+
+    # the admin history view still lists the history, once the request that wrote it has finished
+    admin_client.get(reverse("admin:index"))
+    response = admin_client.get(reverse("admin:chat_individualchattranscript_history", args=(transcript.id,)))
+
+    assert response.status_code == 200
+    assert transcript.history.count() == 1
@@ -0,0 +1,79 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.utils import timezone
+
+from chat.services.history_retention import prune_history, prune_model_history
+
+
+def _edit(transcript, times):
+    for i in range(times):
+        transcript.content = f"Edit {i}"
+        transcript.save()
+
+
+def test_first_and_last_versions_kept(settings, individual_chat_transcript_factory):
+    settings.HISTORY_PRUNE_BATCH_SIZE = 1
+    transcripts = individual_chat_transcript_factory.create_batch(2, content="Original")
+    for transcript in transcripts:
+        _edit(transcript, 3)
+    single_version = individual_chat_transcript_factory()
+
+    report = prune_model_history("chat.IndividualChatTranscript")
+
+    assert report.rows == 4
+    assert report.bytes > 0
+    for transcript in transcripts:
+        assert [h.content for h in transcript.history.all()] == ["Edit 2", "Original"]
+    assert single_version.history.count() == 1
+
+
+def test_max_age(settings, individual_chat_transcript_factory):
+    settings.HISTORY_RETENTION_POLICIES = {"chat.IndividualChatTranscript": {"max_age_days": 30}}
+    transcript = individual_chat_transcript_factory(content="Original")
+    transcript.history.update(history_date=timezone.now() - timedelta(days=31))
+    _edit(transcript, 2)
+
+    report = prune_model_history("chat.IndividualChatTranscript")
+
+    assert report.rows == 1
+    assert [h.content for h in transcript.history.all()] == ["Edit 1", "Edit 0"]
+
+
+def test_max_age_with_first_and_last(settings, individual_chat_transcript_factory):
+    settings.HISTORY_RETENTION_POLICIES = {
+        "chat.IndividualChatTranscript": {"max_age_days": 30, "first_and_last": True}
+    }
+    transcript = individual_chat_transcript_factory(content="Original")
+    transcript.history.update(history_date=timezone.now() - timedelta(days=31))
+    _edit(transcript, 3)
+
+    prune_model_history("chat.IndividualChatTranscript")
+
+    assert [h.content for h in transcript.history.all()] == ["Edit 2", "Edit 0"]
+
+
+def test_dry_run(settings, individual_chat_transcript_factory):
+    settings.HISTORY_RETENTION_POLICIES = {"chat.IndividualChatTranscript": {"first_and_last": True}}
+    transcript = individual_chat_transcript_factory()
+    _edit(transcript, 2)
+
+    [report] = prune_history(dry_run=True)
+    assert report["model"] == "chat.IndividualChatTranscript"
+    assert report["rows"] == 1 and report["bytes"] > 0
+    assert transcript.history.count() == 3
+
+    out = StringIO()
+    call_command("prune_history", "--model", "chat.IndividualChatTranscript", stdout=out)
+    assert "chat.IndividualChatTranscript: 1 rows" in out.getvalue()
+    assert transcript.history.count() == 2
+
+
+def test_invalid_retention_policy(settings):
+    settings.HISTORY_RETENTION_POLICIES = {"chat.IndividualChatTranscript": {"max_age": 30}}
+
+    with pytest.raises(ImproperlyConfigured):
+        prune_history()
@@ -158,3 +158,49 @@ def test_existing_user_no_update(existing_user, existing_transcript, make_input_
     assert transcripts.count() == 2
     assert transcripts.last().role == "user"
     assert transcripts.last().content == "Just another message"
+
+
+def _ingest(participant_id, input_data):
+    serializer = IndividualIncomingMessageSerializer(data=input_data)
+    serializer.is_valid(raise_exception=True)
+    return ingest_request(participant_id, serializer.validated_data)
+
+
+def test_existing_user_unchanged_not_written(make_input_data, django_assert_num_queries):
+    _ingest("returning_user", make_input_data(message="first message"))
+    user = User.objects.get(id="returning_user")
+    user_history_count = user.history.count()
+
+    # savepoint, upsert of user and session, transcript insert, transcript history insert, release savepoint
+    with django_assert_num_queries(5):
+        returned_user, session, transcript = _ingest("returning_user", make_input_data(message="second message"))
+
+    assert returned_user == user
+    assert returned_user.created_at == user.created_at
+    assert user.history.count() == user_history_count
+    assert session.transcripts.count() == 3
+    assert transcript.content == "second message"
+    assert transcript.history.count() == 1
+
+
+def test_new_user_history_recorded(make_input_data, django_assert_num_queries):
+    # additionally the user and session history inserts
+    with django_assert_num_queries(7):
+        user, session, transcript = _ingest("brand_new_user", make_input_data(message="hello"))
+
+    assert user.history.get().history_type == "+"
+    assert session.history.get().history_type == "+"
+    assert IndividualChatTranscript.history.filter(session_id=session.id).count() == 2
+
+
+def test_changed_user_attributes_updated(make_input_data):
+    _ingest("renamed_user", make_input_data(message="first message"))
+    created_at = User.objects.get(id="renamed_user").created_at
+
+    _ingest("renamed_user", make_input_data(overrides={"name": "Alicia"}, message="second message"))
+
+    user = User.objects.get(id="renamed_user")
+    assert user.name == "Alicia"
+    assert user.created_at == created_at
+    assert [h.history_type for h in user.history.order_by("history_date")] == ["+", "~"]
+    assert user.history.latest().name == "Alicia"
@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock, patch
+import pytest
+import redis
+
+from chat.models import GroupPrompt, GroupStrategyPhase, GroupStrategyPhaseConfig, MessageType
+from chat.services.lookup_cache import group_prompt_activities, group_strategy_phase_configs, lookup_cache_stats
+
+
+@pytest.fixture
+def mock_redis_client():
+    client = MagicMock()
+    client.get.return_value = b"3"
+    with patch("chat.services.lookup_cache.get_redis_client", return_value=client):
+        yield client
+
+
+def _phase_config(min_wait_seconds: int) -> GroupStrategyPhaseConfig:
+    return GroupStrategyPhaseConfig.objects.create(
+        group_strategy_phase=GroupStrategyPhase.AFTER_AUDIENCE,
+        min_wait_seconds=min_wait_seconds,
+        max_wait_seconds=min_wait_seconds,
+    )
+
+
+def test_snapshot_served_from_memory(settings, mock_redis_client, django_assert_num_queries):
+    settings.LOOKUP_CACHE_VERSION_CHECK_SECONDS = 60
+    GroupStrategyPhaseConfig.objects.all().delete()
+    _phase_config(5)
+    group_strategy_phase_configs.clear()
+    stats_before = group_strategy_phase_configs.stats()
+
+    with django_assert_num_queries(1):
+        for _ in range(3):
+            assert group_strategy_phase_configs.get(GroupStrategyPhase.AFTER_AUDIENCE).min_wait_seconds == 5
+        assert group_strategy_phase_configs.get(GroupStrategyPhase.AFTER_REMINDER) is None
+
+    assert group_strategy_phase_configs.stats() == {
+        "hits": stats_before["hits"] + 3,
+        "misses": stats_before["misses"] + 1,
+    }
+    assert lookup_cache_stats()["group_strategy_phase_configs"] == group_strategy_phase_configs.stats()
+
+
+def test_write_invalidates_snapshot(settings, mock_redis_client, django_capture_on_commit_callbacks):
+    settings.LOOKUP_CACHE_VERSION_CHECK_SECONDS = 60
+    GroupStrategyPhaseConfig.objects.all().delete()
+    config = _phase_config(5)
+    assert group_strategy_phase_configs.get(GroupStrategyPhase.AFTER_AUDIENCE).min_wait_seconds == 5
+
+    with django_capture_on_commit_callbacks(execute=True):
+        config.min_wait_seconds = config.max_wait_seconds = 10
+        config.save()
+    assert group_strategy_phase_configs.get(GroupStrategyPhase.AFTER_AUDIENCE).min_wait_seconds == 10
+    # other processes are told to reload once the write commits
+    mock_redis_client.incr.assert_called_with("lookup-cache:group_strategy_phase_configs:version")
+
+    config.delete()
+    assert group_strategy_phase_configs.get(GroupStrategyPhase.AFTER_AUDIENCE) is None
+
+
+def test_write_in_other_process_invalidates_snapshot(settings, mock_redis_client):
+    settings.LOOKUP_CACHE_VERSION_CHECK_SECONDS = 0
+    GroupPrompt.objects.create(
+        week=1, message_type=MessageType.INITIAL, strategy_type=GroupStrategyPhase.FOLLOWUP, activity="first"
+    )
+    key = (1, MessageType.INITIAL, GroupStrategyPhase.FOLLOWUP)
+    assert group_prompt_activities.get(key) == "first"
+
+    # simulate a write from another process, which does not fire signals here
+    GroupPrompt.objects.filter(week=1).update(activity="second")
+    assert group_prompt_activities.get(key) == "first"
+    mock_redis_client.get.return_value = b"4"
+    assert group_prompt_activities.get(key) == "second"
+
+
+def test_redis_unavailable_reads_database(settings, mock_redis_client, django_assert_num_queries):
+    settings.LOOKUP_CACHE_VERSION_CHECK_SECONDS = 60
+    mock_redis_client.get.side_effect = redis.ConnectionError("down")
+    GroupStrategyPhaseConfig.objects.all().delete()
+    _phase_config(5)
+
+    with django_assert_num_queries(2):
+        group_strategy_phase_configs.get(GroupStrategyPhase.AFTER_AUDIENCE)
+        group_strategy_phase_configs.get(GroupStrategyPhase.AFTER_AUDIENCE)
@@ -1,8 +1,11 @@
 from django.forms import ValidationError
 import pytest
 from chat.models import (
+    BaseChatTranscript,
     GroupStrategyPhasesThatAllowConfig,
     GroupStrategyPhaseConfig,
+    IndividualChatTranscript,
+    compute_content_hash,
 )
 
 
@@ -47,3 +50,34 @@ def test_group_strategy_phase_config_cleaning():
     )
     with pytest.raises(ValidationError):
         config.clean()
+
+
+def test_transcript_content_hash_set_on_save_and_bulk_create(individual_session_factory):
+    session = individual_session_factory()
+    created = IndividualChatTranscript.objects.create(
+        session=session, role=BaseChatTranscript.Role.ASSISTANT, content="Hello", hub_initiated=True
+    )
+    (bulk_created,) = IndividualChatTranscript.objects.bulk_create(
+        [IndividualChatTranscript(session=session, role=BaseChatTranscript.Role.USER, content="Hi there")]
+    )
+
+    created.refresh_from_db()
+    bulk_created.refresh_from_db()
+    assert created.content_hash == compute_content_hash("Hello")
+    assert bulk_created.content_hash == compute_content_hash("Hi there")
+
+
+def test_initial_message_exists_matches_on_hash_and_content(individual_session_factory):
+    session = individual_session_factory()
+    for _ in range(2):
+        # duplicated initial messages do not break the lookup
+        IndividualChatTranscript.objects.create(
+            session=session, role=BaseChatTranscript.Role.ASSISTANT, content="Initial message", hub_initiated=True
+        )
+
+    assert IndividualChatTranscript.initial_message_exists("Initial message", session.user)
+    assert not IndividualChatTranscript.initial_message_exists("Other message", session.user)
+
+    # a transcript whose hash disagrees with its content (e.g. updated with queryset.update) is not matched
+    IndividualChatTranscript.objects.filter(session=session).update(content="Edited message")
+    assert not IndividualChatTranscript.initial_message_exists("Edited message", session.user)
@@ -0,0 +1,63 @@
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import Group as AuthGroup
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from chat.models import IndividualChatTranscript
+from chat.routers import (
+    REPLICA_DB_ALIAS,
+    REPLICA_PINNED_COOKIE,
+    AdminReplicaMiddleware,
+    ReplicaRouter,
+    _reading_from_replica,
+    read_from_replica,
+)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setitem(settings.DATABASES, REPLICA_DB_ALIAS, settings.DATABASES["default"])
+
+
+# outside of a test transaction, as reads inside transactions always use the primary
+@pytest.mark.django_db(transaction=True)
+def test_reads_use_replica_only_inside_read_from_replica(replica):
+    router = ReplicaRouter()
+
+    assert router.db_for_read(IndividualChatTranscript) == "default"
+    with read_from_replica():
+        assert router.db_for_read(IndividualChatTranscript) == REPLICA_DB_ALIAS
+        assert router.db_for_read(AuthGroup) == "default"
+        assert router.db_for_write(IndividualChatTranscript) == "default"
+    assert router.db_for_read(IndividualChatTranscript) == "default"
+
+
+def test_reads_use_primary_without_replica():
+    with read_from_replica():
+        assert ReplicaRouter().db_for_read(IndividualChatTranscript) == "default"
+
+
+def test_reads_inside_transaction_use_primary(replica):
+    with read_from_replica():
+        assert ReplicaRouter().db_for_read(IndividualChatTranscript) == "default"
+
+
+def _view(request):
+    return HttpResponse(str(_reading_from_replica.get()))
+
+
+def test_admin_reads_stick_to_primary_after_edit(replica):
+    middleware = AdminReplicaMiddleware(_view)
+    factory = RequestFactory()
+
+    assert middleware(factory.get("/admin/chat/user/")).content == b"True"
+    assert middleware(factory.get("/api/participant/")).content == b"False"
+
+    response = middleware(factory.post("/admin/chat/user/1/change/"))
+    assert response.content == b"False"
+    assert response.cookies[REPLICA_PINNED_COOKIE]["max-age"] == 30
+
+    request = factory.get("/admin/chat/user/")
+    request.COOKIES[REPLICA_PINNED_COOKIE] = "1"
+    assert middleware(request).content == b"False"
@@ -0,0 +1,61 @@
+import pytest
+from celery.backends.redis import RedisBackend
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django_celery_results.models import TaskResult
+
+from chat.services.group_pipeline import take_action_on_group
+from chat.services.summaries import generate_weekly_summaries
+from chat.services.task_results import prune_task_results
+from config.celery import TaskResultPolicyAnnotation
+
+
+def _task_result(days_ago: int) -> TaskResult:
+    task_result = TaskResult.objects.create(task_id=f"task-{TaskResult.objects.count()}", status="SUCCESS")
+    TaskResult.objects.filter(id=task_result.id).update(date_done=timezone.now() - timezone.timedelta(days=days_ago))
+    return task_result
+
+
+def test_prune_task_results_in_batches(settings, django_assert_num_queries):
+    settings.TASK_RESULT_RETENTION_DAYS = 14
+    settings.TASK_RESULT_PRUNE_BATCH_SIZE = 2
+    old = [_task_result(days_ago=20) for _ in range(5)]
+    recent = [_task_result(days_ago=1) for _ in range(2)]
+
+    # 3 batches of (select ids, delete) plus the final empty select
+    with django_assert_num_queries(7):
+        assert prune_task_results() == len(old)
+
+    assert set(TaskResult.objects.values_list("id", flat=True)) == {t.id for t in recent}
+
+
+def test_pipeline_task_results_ignored():
+    assert take_action_on_group.ignore_result
+    assert not generate_weekly_summaries.ignore_result
+
+
+@pytest.mark.parametrize(
+    "policy,expected",
+    [
+        ("ignore", {"ignore_result": True}),
+        ("db", None),
+    ],
+)
+def test_task_result_policy_annotation(settings, policy, expected):
+    settings.TASK_RESULT_POLICIES = {take_action_on_group.name: policy}
+    assert TaskResultPolicyAnnotation().annotate(take_action_on_group) == expected
+
+
+def test_task_result_policy_annotation_redis(settings, monkeypatch):
+    monkeypatch.setattr(TaskResultPolicyAnnotation, "_redis_backend", None)
+    settings.TASK_RESULT_POLICIES = {take_action_on_group.name: "redis"}
+    settings.TASK_RESULT_REDIS_EXPIRES_SECONDS = 60
+    annotation = TaskResultPolicyAnnotation().annotate(take_action_on_group)
+    assert isinstance(annotation["backend"], RedisBackend)
+    assert annotation["backend"].expires == 60
+
+
+def test_task_result_policy_annotation_unknown(settings):
+    settings.TASK_RESULT_POLICIES = {take_action_on_group.name: "somewhere"}
+    with pytest.raises(ImproperlyConfigured):
+        TaskResultPolicyAnnotation().annotate(take_action_on_group)
@@ -1,13 +1,20 @@
+import json
 from dataclasses import asdict
+
+from asgiref.sync import sync_to_async
+from celery import current_app
 from django.conf import settings
-from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
 from django.utils import timezone
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
 from .services.group_pipeline import handle_inbound_group_initial_message, handle_inbound_group_message
 from .services.individual_pipeline import handle_inbound_individual_initial_message, individual_pipeline
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.serializers import Serializer
 from .serializers import (
     GroupIncomingMessageSerializer,
     IndividualIncomingMessageSerializer,
@@ -21,48 +28,68 @@ class HealthCheckView(APIView):
         return Response({"message": "Service is healthy", "status": "ok", "code": 200}, status=status.HTTP_200_OK)
 
 
-class BaseIngestView(APIView):
-    def dispatch(self, request, *args, **kwargs):
+class BaseIngestView(View):
+    """
+    Async base for the ingest endpoints, which only validate the payload and enqueue a pipeline task. Under ASGI
+    a slow broker publish then waits in a thread instead of blocking the worker process that serves requests.
+    Responses match the DRF views these replaced.
+    """
+
+    serializer_class: type[Serializer]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # the endpoints authenticate with an API key rather than a session
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
         # Check API key
         auth_header = request.headers.get("Authorization")
         if not auth_header or auth_header != f"Bearer {settings.INBOUND_MESSAGE_API_KEY}":
-            raise PermissionDenied("Invalid API key")
-        return super().dispatch(request, *args, **kwargs)
+            return JsonResponse({"detail": "Invalid API key"}, status=status.HTTP_403_FORBIDDEN)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def post(self, request, id):
+        try:
+            data = json.loads(request.body) if request.body else {}
+        except ValueError as e:
+            return JsonResponse({"detail": f"JSON parse error - {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.serializer_class(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # tasks run eagerly (in development and tests) use the request's database connection, so they must run
+        # in its thread
+        thread_sensitive = current_app.conf.task_always_eager
+        await sync_to_async(self.enqueue, thread_sensitive=thread_sensitive)(id, asdict(serializer.validated_data))
+        return JsonResponse({"message": "Data received"}, status=status.HTTP_202_ACCEPTED)
+
+    def enqueue(self, id: str, data: dict):
+        raise NotImplementedError
 
 
 class IngestIndividualView(BaseIngestView):
-    def post(self, request, id):
-        serializer = IndividualIncomingMessageSerializer(data=request.data)
-        if serializer.is_valid():
-            individual_pipeline.delay(id, asdict(serializer.validated_data), request_recieved_at=timezone.now())
-            return Response({"message": "Data received"}, status=status.HTTP_202_ACCEPTED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer_class = IndividualIncomingMessageSerializer
+
+    def enqueue(self, id, data):
+        individual_pipeline.delay(id, data, request_recieved_at=timezone.now())
 
 
 class IngestGroupView(BaseIngestView):
-    def post(self, request, id):
-        serializer = GroupIncomingMessageSerializer(data=request.data)
-        if serializer.is_valid():
-            handle_inbound_group_message.delay(
-                id, asdict(serializer.validated_data), request_recieved_at=timezone.now()
-            )
-            return Response({"message": "Data received"}, status=status.HTTP_202_ACCEPTED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer_class = GroupIncomingMessageSerializer
+
+    def enqueue(self, id, data):
+        handle_inbound_group_message.delay(id, data, request_recieved_at=timezone.now())
 
 
 class IngestIndividualInitialMessageView(BaseIngestView):
-    def post(self, request, id):
-        serializer = IndividualIncomingInitialMessageSerializer(data=request.data)
-        if serializer.is_valid():
-            handle_inbound_individual_initial_message.delay(id, asdict(serializer.validated_data))
-            return Response({"message": "Data received"}, status=status.HTTP_202_ACCEPTED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer_class = IndividualIncomingInitialMessageSerializer
+
+    def enqueue(self, id, data):
+        handle_inbound_individual_initial_message.delay(id, data)
 
 
 class IngestGroupInitialMessageView(BaseIngestView):
-    def post(self, request, id):
-        serializer = GroupIncomingInitialMessageSerializer(data=request.data)
-        if serializer.is_valid():
-            handle_inbound_group_initial_message.delay(id, asdict(serializer.validated_data))
-            return Response({"message": "Data received"}, status=status.HTTP_202_ACCEPTED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer_class = GroupIncomingInitialMessageSerializer
+
+    def enqueue(self, id, data):
+        handle_inbound_group_initial_message.delay(id, data)
@@ -13,7 +13,41 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 
+class TaskResultPolicyAnnotation:
+    """
+    Applies the TASK_RESULT_POLICIES setting to each task as it is registered (see CELERY_TASK_ANNOTATIONS).
+    """
+
+    _redis_backend = None
+
+    def annotate(self, task):
+        from django.conf import settings
+        from django.core.exceptions import ImproperlyConfigured
+
+        policy = settings.TASK_RESULT_POLICIES.get(task.name, "db")
+        match policy:
+            case "ignore":
+                return {"ignore_result": True}
+            case "redis":
+                return {"backend": self._get_redis_backend()}
+            case "db":
+                return None
+            case _:
+                raise ImproperlyConfigured(f"Unknown result policy '{policy}' for task {task.name}")
+
+    @classmethod
+    def _get_redis_backend(cls):
+        from celery.backends.redis import RedisBackend
+        from django.conf import settings
+
+        # shared by all tasks using the redis policy so that they share a connection pool
+        if cls._redis_backend is None:
+            cls._redis_backend = RedisBackend(
+                app=app, url=settings.TASK_RESULT_REDIS_URL, expires=settings.TASK_RESULT_REDIS_EXPIRES_SECONDS
+            )
+        return cls._redis_backend
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f"Request: {self.request!r}")
-
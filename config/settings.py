@@ -62,6 +62,7 @@ MIDDLEWARE = [
     "csp.middleware.CSPMiddleware",
     "djangosaml2.middleware.SamlSessionMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
+    "chat.routers.AdminReplicaMiddleware",
 ]
 
 REQUIRE_SAML_AUTHENTICATION = os.getenv("REQUIRE_SAML_AUTHENTICATION", "False") == "True"
@@ -127,6 +128,46 @@ else:
         }
     }
 
+# Database connections are kept open between requests and tasks (rather than opened for each one) and checked
+# before being reused, tuned separately for the web and celery worker processes (PROCESS_ROLE).
+# With DB_POOL=True, each process instead keeps a connection pool (requires psycopg 3 with its pool extra).
+PROCESS_ROLE = os.environ.get("PROCESS_ROLE", "web")
+_DB_CONNECTION_DEFAULTS = {
+    "web": {"CONN_MAX_AGE": "60", "POOL_MIN_SIZE": "1", "POOL_MAX_SIZE": "4"},
+    "worker": {"CONN_MAX_AGE": "600", "POOL_MIN_SIZE": "1", "POOL_MAX_SIZE": "2"},
+}[PROCESS_ROLE]
+
+
+def _db_connection_setting(name):
+    return int(os.environ.get(f"DB_{PROCESS_ROLE.upper()}_{name}", _DB_CONNECTION_DEFAULTS[name]))
+
+
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True"
+if os.environ.get("DB_POOL", "False") == "True":
+    # pooled connections are returned to the pool instead of being kept open by Django
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": _db_connection_setting("POOL_MIN_SIZE"),
+            "max_size": _db_connection_setting("POOL_MAX_SIZE"),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = _db_connection_setting("CONN_MAX_AGE")
+
+# Read-only workloads (admin pages, summaries, tester views) read chat data from a replica of the database when
+# DB_REPLICA_HOST is set (e.g. the Aurora reader endpoint), see chat/routers.py. Without it, everything uses the
+# primary. After an admin edit, the editor reads from the primary for REPLICA_STICKY_SECONDS.
+if os.environ.get("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["DB_REPLICA_HOST"],
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["chat.routers.ReplicaRouter"]
+REPLICA_READ_APPS = ["chat", "tester"]
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "30"))
+
 STORAGES = {
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
@@ -228,6 +269,79 @@ CELERY_TASK_DEFAULT_PRIORITY = 0
 # CELERY_TIMEZONE = os.environ.get('CELERY_TIMEZONE', 'UTC')
 # CELERY_ENABLE_UTC = True
 
+# Where each task's result is stored: "ignore" (not stored), "redis" (expires after
+# TASK_RESULT_REDIS_EXPIRES_SECONDS) or "db" (CELERY_RESULT_BACKEND). Unlisted tasks use "db".
+# Nothing reads the results of the message pipeline tasks, so by default they are not stored.
+# Entries can be overridden with a JSON object in the TASK_RESULT_POLICIES env variable.
+TASK_RESULT_POLICIES = {
+    "chat.services.individual_pipeline.individual_pipeline": "ignore",
+    "chat.services.individual_pipeline.handle_inbound_individual_initial_message": "ignore",
+    "chat.services.group_pipeline.handle_inbound_group_message": "ignore",
+    "chat.services.group_pipeline.handle_inbound_group_initial_message": "ignore",
+    "chat.services.group_pipeline.take_action_on_group": "ignore",
+    "chat.services.group_pipeline.precompute_group_action": "ignore",
+    **json.loads(os.environ.get("TASK_RESULT_POLICIES", "{}")),
+}
+CELERY_TASK_ANNOTATIONS = ["config.celery.TaskResultPolicyAnnotation"]
+# failures are still stored for ignored tasks so that they show up in the admin
+CELERY_TASK_STORE_ERRORS_EVEN_IF_IGNORED = True
+TASK_RESULT_REDIS_URL = os.environ.get("TASK_RESULT_REDIS_URL", CELERY_BROKER_URL)
+TASK_RESULT_REDIS_EXPIRES_SECONDS = int(os.environ.get("TASK_RESULT_REDIS_EXPIRES_SECONDS", "86400"))
+
+# Stored task results older than this are deleted by the scheduled prune_task_results task
+TASK_RESULT_RETENTION_DAYS = int(os.environ.get("TASK_RESULT_RETENTION_DAYS", "14"))
+TASK_RESULT_PRUNE_BATCH_SIZE = int(os.environ.get("TASK_RESULT_PRUNE_BATCH_SIZE", "5000"))
+
+# History tables of transcripts and pipeline records are partitioned by month, see services/history_partitions.py.
+# Partitions are created this many months ahead, and archive_history_partitions exports and drops partitions
+# older than HISTORY_ARCHIVE_AFTER_MONTHS to HISTORY_ARCHIVE_DIR.
+HISTORY_PARTITION_MONTHS_AHEAD = int(os.environ.get("HISTORY_PARTITION_MONTHS_AHEAD", "3"))
+HISTORY_ARCHIVE_AFTER_MONTHS = int(os.environ.get("HISTORY_ARCHIVE_AFTER_MONTHS", "12"))
+HISTORY_ARCHIVE_DIR = os.environ.get("HISTORY_ARCHIVE_DIR", os.path.join(BASE_DIR, "history_archive"))
+
+# Which changes are recorded in each model's history (see chat/history.py): "full" (every save and delete,
+# the default for unlisted models), "create" (only creation) or "off". Pipeline records are saved at every
+# stage, so only their creation is recorded by default.
+# Entries can be overridden with a JSON object in the HISTORY_POLICIES env variable.
+HISTORY_POLICIES = {
+    "chat.IndividualPipelineRecord": "create",
+    "chat.GroupPipelineRecord": "create",
+    **json.loads(os.environ.get("HISTORY_POLICIES", "{}")),
+}
+# Buffer history rows and write them in bulk at the end of each request and task, instead of one insert per save
+HISTORY_BATCHED_WRITES = os.environ.get("HISTORY_BATCHED_WRITES", "False") == "True"
+HISTORY_BATCH_SIZE = int(os.environ.get("HISTORY_BATCH_SIZE", "500"))
+
+# How long history is kept, per model (see services/history_retention.py), enforced daily by prune_history:
+# "max_age_days" deletes versions older than that, and "first_and_last" deletes every version of an object
+# except its first and last. Unlisted models keep all of their history.
+# Entries can be overridden with a JSON object in the HISTORY_RETENTION_POLICIES env variable.
+HISTORY_RETENTION_POLICIES = {
+    "chat.IndividualChatTranscript": {"first_and_last": True},
+    "chat.GroupChatTranscript": {"first_and_last": True},
+    "chat.IndividualPipelineRecord": {"first_and_last": True},
+    "chat.GroupPipelineRecord": {"first_and_last": True},
+    **json.loads(os.environ.get("HISTORY_RETENTION_POLICIES", "{}")),
+}
+HISTORY_PRUNE_BATCH_SIZE = int(os.environ.get("HISTORY_PRUNE_BATCH_SIZE", "5000"))
+
+# Redis used for cross-worker coordination (leases, counters). Defaults to the broker instance.
+REDIS_URL = os.environ.get("REDIS_URL", CELERY_BROKER_URL)
+
+# Per-group lease serializing group ingest and scheduling across workers
+GROUP_INGEST_LOCK_ENABLED = os.environ.get("GROUP_INGEST_LOCK_ENABLED", "False") == "True"
+GROUP_INGEST_LOCK_TTL_SECONDS = int(os.environ.get("GROUP_INGEST_LOCK_TTL_SECONDS", "30"))
+GROUP_INGEST_LOCK_WAIT_SECONDS = int(os.environ.get("GROUP_INGEST_LOCK_WAIT_SECONDS", "20"))
+
+# Precompute scheduled group responses during the wait window instead of when the action fires.
+# The rate limit is a celery rate limit string (per worker), pacing LLM calls for groups scheduled together.
+GROUP_PRECOMPUTE_ENABLED = os.environ.get("GROUP_PRECOMPUTE_ENABLED", "False") == "True"
+GROUP_PRECOMPUTE_RATE_LIMIT = os.environ.get("GROUP_PRECOMPUTE_RATE_LIMIT", "30/m")
+
+# In-process snapshots of small, rarely changing lookup tables (strategy phase configs, group prompts).
+# Writes invalidate them everywhere via a version counter in redis, which is checked at most this often.
+LOOKUP_CACHE_VERSION_CHECK_SECONDS = int(os.environ.get("LOOKUP_CACHE_VERSION_CHECK_SECONDS", "5"))
+
 # Core app config
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 BCFG_DOMAIN = os.environ.get("BCFG_DOMAIN", "")
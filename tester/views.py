@@ -2,6 +2,7 @@
 from django.conf import settings
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.db import IntegrityError, transaction
+from chat.routers import read_from_replica
 from chat.models import (
     BaseChatTranscript,
     GroupSession,
@@ -37,6 +38,7 @@ GPT_MODEL_OPTIONS = [
 
 
 class ChatTestInterface(View, PermissionRequiredMixin):
+    @read_from_replica()
     def get(self, request):
         # Retrieve stored responses to display on the page.
         responses = ChatResponse.objects.order_by("-created_at")
@@ -145,6 +147,7 @@ def create_test_case(request):
     return JsonResponse({"success": False, "error": "Missing required fields"}, status=400)
 
 
+@read_from_replica()
 def chat_transcript(request, test_case_id):
     transcript = []
     user = ChatUser.objects.get(id=test_case_id)
@@ -181,6 +184,7 @@ def chat_transcript(request, test_case_id):
 
 
 class GroupChatTestInterface(View):
+    @read_from_replica()
     def get(self, request):
         test_groups = Group.objects.filter(is_test=True)
         test_groups_data = []
@@ -256,6 +260,7 @@ def create_group_test_case(request):
     return JsonResponse({"success": False, "error": "Missing required fields"}, status=400)
 
 
+@read_from_replica()
 def group_chat_transcript(request, group_id):
     group = Group.objects.get(id=group_id)
     transcripts = (